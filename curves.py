@@ -0,0 +1,396 @@
+import argparse
+import functools
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+# Базисные матрицы кубических сегментов в степенном базисе: точка сегмента равна T @ M @ P,
+# где T = [t^3, t^2, t, 1], а P — четыре управляющие точки окна.
+BEZIER_MATRIX = np.array([[-1, 3, -3, 1], [3, -6, 3, 0], [-3, 3, 0, 0], [1, 0, 0, 0]], dtype=float)
+BSPLINE_MATRIX = np.array([[-1, 3, -3, 1], [3, -6, 3, 0], [-3, 0, 3, 0], [1, 4, 1, 0]], dtype=float) / 6
+# Эрмит: геометрия [P0, P3, P1 - P0, P2 - P3] сразу свернута в матрицу над исходными точками.
+HERMITE_MATRIX = np.array([[2, -2, 1, 1], [-3, 3, -2, -1], [0, 0, 1, 0], [1, 0, 0, 0]], dtype=float) @ \
+    np.array([[1, 0, 0, 0], [0, 0, 0, 1], [-1, 1, 0, 0], [0, 0, 1, -1]], dtype=float)
+
+# Тип кривой -> (базисная матрица, шаг окна по управляющим точкам)
+CURVE_BASES = {
+    "Безье": (BEZIER_MATRIX, 1),
+    "Эрмит": (HERMITE_MATRIX, 3),
+    "B-сплайн": (BSPLINE_MATRIX, 1),
+}
+
+STEP_COUNT = 120
+
+# Допуск плоскостности (в пикселях) при адаптивном разбиении и предельная глубина деления
+DEFAULT_TOLERANCE = 0.5
+MAX_SUBDIVISION_DEPTH = 12
+
+# Переход от окна кривой каждого типа к эквивалентным контрольным точкам Безье
+BEZIER_CONTROLS = {kind: np.linalg.solve(BEZIER_MATRIX, matrix) for kind, (matrix, _) in CURVE_BASES.items()}
+
+
+def power_basis(t):
+    """Строки степенного базиса [t^3, t^2, t, 1] для скаляра или массива t."""
+    t = np.asarray(t, dtype=float)
+    return np.stack([t**3, t**2, t, np.ones_like(t)], axis=-1)
+
+
+@functools.lru_cache(maxsize=16)
+def sampled_basis(kind, steps=STEP_COUNT):
+    """Матрица (steps x 4) = T @ M для равномерной сетки t; вычисляется один раз на тип и число шагов."""
+    basis = power_basis(np.linspace(0, 1, steps)) @ CURVE_BASES[kind][0]
+    basis.flags.writeable = False
+    return basis
+
+
+def window_starts(count, stride=1):
+    """Индексы первых управляющих точек всех окон кривой из count точек."""
+    return range(0, max(count - 3, 0), stride)
+
+
+def affected_windows(index, count, stride=1):
+    """Начала окон, в которые входит управляющая точка index (не больше четырех)."""
+    first = max(0, -(-(index - 3) // stride) * stride)
+    return range(first, min(index, count - 4) + 1, stride)
+
+
+def segment_windows(points, stride=1, starts=None):
+    """Стопка окон управляющих точек (сегменты x 4 x 2) для кривой с шагом окна stride."""
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if starts is None:
+        starts = window_starts(len(points), stride)
+    starts = np.asarray(starts, dtype=np.int64)
+    return points[starts[:, None] + np.arange(4)]
+
+
+def polygon_windows(polygons, kind):
+    """Окна всех сегментов пачки управляющих многоугольников одинаковой длины: (многоугольники * сегменты) x 4 x 2."""
+    polygons = np.asarray(polygons, dtype=float)
+    starts = np.asarray(window_starts(polygons.shape[1], CURVE_BASES[kind][1]), dtype=np.int64)
+    return polygons[:, starts[:, None] + np.arange(4)].reshape(-1, 4, 2)
+
+
+def sample_windows(windows, kind, steps=STEP_COUNT):
+    """Равномерные отсчеты сегментов одним матричным умножением: массив (сегменты x steps x 2)."""
+    return sampled_basis(kind, steps) @ np.asarray(windows, dtype=float)
+
+
+def curve_points(points, kind, steps=STEP_COUNT, starts=None):
+    """Точки сегментов кривой kind одним матричным умножением: массив (сегменты x steps x 2).
+
+    starts ограничивает вычисление выбранными окнами (по умолчанию — все сегменты)."""
+    return sample_windows(segment_windows(points, CURVE_BASES[kind][1], starts), kind, steps)
+
+
+def _difference_matrix(steps):
+    """Матрица перехода от коэффициентов [a, b, c, d] к начальным разностям [P0, d1, d2, d3] для шага h."""
+    h = 1 / max(steps - 1, 1)
+    return np.array([[0, 0, 0, 1],
+                     [h**3, h**2, h, 0],
+                     [6 * h**3, 2 * h**2, 0, 0],
+                     [6 * h**3, 0, 0, 0]])
+
+
+# Начиная с этого числа сегментов прямые разности считаются циклом по шагам, а не накопительными суммами
+FORWARD_LOOP_SEGMENTS = 64
+
+
+def forward_difference_windows(windows, kind, steps=STEP_COUNT):
+    """Равномерные отсчеты сегментов методом прямых разностей: массив (сегменты x steps x 2).
+
+    После подготовки разностей каждая следующая точка получается тремя сложениями
+    P += d1, d1 += d2, d2 += d3, выполняемыми сразу для всех сегментов."""
+    windows = np.asarray(windows, dtype=float)
+    p0, d1, d2, d3 = np.moveaxis(_difference_matrix(steps) @ CURVE_BASES[kind][0] @ windows, 1, 0).copy()
+    if len(windows) >= FORWARD_LOOP_SEGMENTS:
+        # Много сегментов: явный цикл по шагам, три сложения над всеми сегментами сразу
+        result = np.empty((steps, len(windows), 2))
+        for row in result:
+            row[...] = p0
+            p0 += d1
+            d1 += d2
+            d2 += d3
+        return result.transpose(1, 0, 2)
+    # Мало сегментов и много шагов: те же сложения накопительными суммами по оси шагов
+    deltas = np.empty((steps + 2, len(windows), 2))
+    deltas[0], deltas[1], deltas[2] = p0, d1, d2
+    deltas[3:] = d3
+    np.add.accumulate(deltas[2:], axis=0, out=deltas[2:])  # d2 на каждом шаге
+    np.add.accumulate(deltas[1:-1], axis=0, out=deltas[1:-1])  # d1 на каждом шаге
+    np.add.accumulate(deltas[:-2], axis=0, out=deltas[:-2])  # сами точки
+    return deltas[:-2].transpose(1, 0, 2)
+
+
+def forward_difference_points(points, kind, steps=STEP_COUNT, starts=None):
+    """Точки сегментов методом прямых разностей: массив (сегменты x steps x 2), как у curve_points."""
+    return forward_difference_windows(segment_windows(points, CURVE_BASES[kind][1], starts), kind, steps)
+
+
+# Способы вычисления равномерных отсчетов по окнам сегментов с одинаковой сигнатурой
+CURVE_ENGINES = {
+    "matrix": sample_windows,
+    "forward": forward_difference_windows,
+}
+
+
+def benchmark_engines(count=2000, steps=1000, repeat=3, long_steps=1_000_000, seed=0):
+    """Сравнивает матричный способ и прямые разности на случайных кривых.
+
+    Возвращает лучшее время (с) каждого способа при steps отсчетах на сегмент и наибольшее
+    отклонение (px) прямых разностей от матричного способа при steps и при long_steps отсчетах.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 640, size=(count + 3, 2))
+
+    def best(func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    windows = segment_windows(points)
+    results = {}
+    for name, engine in CURVE_ENGINES.items():
+        results[name] = best(lambda: engine(windows, "Безье", steps))
+    for kind in CURVE_BASES:
+        deviation = np.abs(forward_difference_points(points, kind, steps) - curve_points(points, kind, steps)).max()
+        long_points = points[:8]
+        long_deviation = np.abs(forward_difference_points(long_points, kind, long_steps) -
+                                curve_points(long_points, kind, long_steps)).max()
+        results[f"deviation {kind}"] = float(deviation)
+        results[f"deviation {kind} ({long_steps})"] = float(long_deviation)
+    return results
+
+
+def _flatness(pieces):
+    """Наибольшее отклонение внутренних контрольных точек Безье от равномерного деления хорды."""
+    p0, p1, p2, p3 = pieces[:, 0], pieces[:, 1], pieces[:, 2], pieces[:, 3]
+    d1 = np.abs(3 * p1 - 2 * p0 - p3).max(axis=1)
+    d2 = np.abs(3 * p2 - p0 - 2 * p3).max(axis=1)
+    return np.maximum(d1, d2) / 3
+
+
+def _split_half(pieces):
+    """Делит кубические сегменты Безье пополам по алгоритму де Кастельжо."""
+    p0, p1, p2, p3 = pieces[:, 0], pieces[:, 1], pieces[:, 2], pieces[:, 3]
+    p01, p12, p23 = (p0 + p1) / 2, (p1 + p2) / 2, (p2 + p3) / 2
+    p012, p123 = (p01 + p12) / 2, (p12 + p23) / 2
+    mid = (p012 + p123) / 2
+    return np.stack([p0, p01, p012, mid], axis=1), np.stack([mid, p123, p23, p3], axis=1)
+
+
+def tessellate(windows, kind, tolerance=DEFAULT_TOLERANCE, max_depth=MAX_SUBDIVISION_DEPTH):
+    """Адаптивно разбивает сегменты на ломаные с отклонением не больше tolerance пикселей.
+
+    Возвращает (points, offsets): вершины всех ломаных подряд и границы сегментов,
+    вершины сегмента i — points[offsets[i]:offsets[i + 1]]."""
+    pieces = BEZIER_CONTROLS[kind] @ np.asarray(windows, dtype=float)
+    owner = np.arange(len(pieces))
+    t0 = np.zeros(len(pieces))
+    width = 1.0
+    done_pieces, done_owner, done_t0 = [], [], []
+    for depth in range(max_depth + 1):
+        flat = _flatness(pieces) <= tolerance if depth < max_depth else np.ones(len(pieces), dtype=bool)
+        done_pieces.append(pieces[flat])
+        done_owner.append(owner[flat])
+        done_t0.append(t0[flat])
+        if flat.all():
+            break
+        left, right = _split_half(pieces[~flat])
+        width /= 2
+        pieces = np.concatenate([left, right])
+        owner = np.tile(owner[~flat], 2)
+        t0 = np.concatenate([t0[~flat], t0[~flat] + width])
+
+    pieces = np.concatenate(done_pieces)
+    owner = np.concatenate(done_owner)
+    order = np.lexsort((np.concatenate(done_t0), owner))
+    pieces, owner = pieces[order], owner[order]
+
+    # Каждый кусок дает свою начальную вершину, каждый сегмент — еще и конечную
+    counts = np.bincount(owner, minlength=len(windows)) + 1
+    offsets = np.zeros(len(windows) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    points = np.empty((offsets[-1], 2))
+    points[np.arange(len(pieces)) + owner] = pieces[:, 0]
+    points[offsets[1:] - 1] = pieces[offsets[1:] - 2 - np.arange(len(windows)), 3]
+    return points, offsets
+
+
+# Имена типов кривых в командной строке
+KIND_NAMES = {"bezier": "Безье", "hermite": "Эрмит", "bspline": "B-сплайн"}
+
+# Примерное число сегментов в одной порции работы
+DEFAULT_CHUNK_SEGMENTS = 16384
+
+# Шаблон одного сегмента в пути SVG: кубическая кривая Безье задается точно, без дискретизации
+SVG_SEGMENT = "M{:.3f},{:.3f}C{:.3f},{:.3f} {:.3f},{:.3f} {:.3f},{:.3f}"
+
+
+def source_layout(path):
+    """Разметка файла управляющих точек: (число многоугольников, число точек в каждом).
+
+    Двумерный .npy (точки x 2) и CSV из двух столбцов считаются одной ломаной, для них
+    число многоугольников равно None. Трехмерный .npy (многоугольники x точки x 2) и CSV
+    со строками x0,y0,x1,y1,... задают набор многоугольников одинаковой длины."""
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+        if data.ndim == 2:
+            return None, data.shape[0]
+        return data.shape[0], data.shape[1]
+    with open(path) as source:
+        first = source.readline()
+        rows = sum(1 for line in source if line.strip()) + bool(first.strip())
+    columns = len(first.split(","))
+    if columns == 2:
+        return None, rows
+    return rows, columns // 2
+
+
+def read_blocks(path, rows):
+    """Читает файл управляющих точек порциями по rows строк (первая ось .npy или строки CSV)."""
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+        for start in range(0, len(data), rows):
+            yield np.asarray(data[start:start + rows], dtype=float)
+        return
+    with open(path) as source:
+        while True:
+            lines = [line for line in itertools.islice(source, rows) if line.strip()]
+            if not lines:
+                return
+            yield np.loadtxt(lines, delimiter=",", ndmin=2)
+
+
+def iter_windows(path, kind, chunk_segments=DEFAULT_CHUNK_SEGMENTS):
+    """Генератор порций (номер первого сегмента, окна сегментов) по файлу управляющих точек.
+
+    Ломаная читается кусками; точки, нужные следующему окну, переносятся в следующую порцию.
+    Многоугольники не делятся между порциями."""
+    stride = CURVE_BASES[kind][1]
+    polygons, size = source_layout(path)
+    first = 0
+    if polygons is None:
+        buffer = np.empty((0, 2))
+        for block in read_blocks(path, chunk_segments * stride):
+            buffer = np.concatenate([buffer, block.reshape(-1, 2)])
+            windows = segment_windows(buffer, stride)
+            if len(windows):
+                yield first, windows
+                first += len(windows)
+                buffer = buffer[len(windows) * stride:]
+        return
+    per_polygon = len(window_starts(size, stride))
+    if per_polygon == 0:
+        return
+    for block in read_blocks(path, max(1, chunk_segments // per_polygon)):
+        windows = polygon_windows(block.reshape(len(block), -1, 2), kind)
+        yield first, windows
+        first += len(windows)
+
+
+def _sample_task(task):
+    """Задача процесса: отсчеты порции сегментов записываются прямо в отображенный в память .npy."""
+    output, first, windows, kind, steps, engine = task
+    samples = CURVE_ENGINES[engine](windows, kind, steps)
+    result = np.load(output, mmap_mode="r+")
+    result[first:first + len(samples)] = samples
+    result.flush()
+    return len(samples)
+
+
+def _svg_task(task):
+    """Задача процесса: пути SVG порции сегментов, по одному элементу path на группу из group сегментов."""
+    windows, kind, group = task
+    controls = (BEZIER_CONTROLS[kind] @ windows).reshape(-1, 8).tolist()
+    paths = []
+    for start in range(0, len(controls), group):
+        data = " ".join(SVG_SEGMENT.format(*segment) for segment in controls[start:start + group])
+        paths.append(f'<path d="{data}"/>\n')
+    return len(controls), "".join(paths)
+
+
+def _ordered_map(func, tasks, workers):
+    """Выполняет задачи в пуле из workers процессов, возвращая результаты по порядку.
+
+    В очереди держится не больше двух задач на процесс, поэтому файл любого размера
+    не считывается в память целиком. При workers == 1 задачи выполняются в текущем процессе."""
+    if workers == 1:
+        yield from map(func, tasks)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(func, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def evaluate_file(source, output, kind, steps=STEP_COUNT, engine="matrix",
+                  chunk_segments=DEFAULT_CHUNK_SEGMENTS, workers=None):
+    """Вычисляет все сегменты кривой kind из файла source и записывает результат в output.
+
+    Для output с расширением .svg пишутся точные пути из кубических кривых Безье (по одному
+    элементу path на многоугольник), иначе — .npy (сегменты x steps x 2) с отсчетами,
+    который заполняется процессами через отображение в память. Возвращает число сегментов."""
+    workers = workers or os.cpu_count() or 1
+    windows = iter_windows(source, kind, chunk_segments)
+    if output.endswith(".svg"):
+        polygons, size = source_layout(source)
+        group = len(window_starts(size, CURVE_BASES[kind][1])) if polygons is not None else chunk_segments
+        total = 0
+        with open(output, "w") as result:
+            result.write('<svg xmlns="http://www.w3.org/2000/svg">\n<g fill="none" stroke="black">\n')
+            tasks = ((chunk, kind, max(group, 1)) for _, chunk in windows)
+            for count, paths in _ordered_map(_svg_task, tasks, workers):
+                result.write(paths)
+                total += count
+            result.write("</g>\n</svg>\n")
+        return total
+
+    polygons, size = source_layout(source)
+    per_polygon = len(window_starts(size, CURVE_BASES[kind][1]))
+    total = per_polygon * polygons if polygons is not None else per_polygon
+    result = np.lib.format.open_memmap(output, mode="w+", dtype=float, shape=(total, steps, 2))
+    del result
+    tasks = ((output, first, chunk, kind, steps, engine) for first, chunk in windows)
+    return sum(_ordered_map(_sample_task, tasks, workers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетное вычисление кривых Безье, Эрмита и B-сплайнов.")
+    parser.add_argument("source", nargs="?", help="управляющие точки: .npy или .csv")
+    parser.add_argument("output", nargs="?", help="результат: .npy с отсчетами или .svg с путями")
+    parser.add_argument("--kind", choices=KIND_NAMES, default="bezier")
+    parser.add_argument("--steps", type=int, default=STEP_COUNT, help="отсчетов на сегмент")
+    parser.add_argument("--engine", choices=CURVE_ENGINES, default="matrix")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SEGMENTS, help="сегментов в порции")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию — по числу ядер)")
+    parser.add_argument("--benchmark", action="store_true", help="сравнить способы вычисления и выйти")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        for name, value in benchmark_engines().items():
+            print(f"{name}: {value:.6g}")
+        return
+    if not args.source or not args.output:
+        parser.error("нужны файлы source и output")
+
+    start = time.perf_counter()
+    total = evaluate_file(args.source, args.output, KIND_NAMES[args.kind], args.steps, args.engine,
+                          args.chunk, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{total} сегментов за {elapsed:.3f} с: {total / max(elapsed, 1e-9):.0f} сегм./с", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
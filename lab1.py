@@ -1,6 +1,9 @@
+import sys
+import time
 import tkinter as tk
-from tkinter import ttk, colorchooser, messagebox
-from PIL import Image, ImageTk, ImageDraw
+from tkinter import ttk, colorchooser, messagebox, filedialog
+from PIL import Image, ImageTk, ImageColor
+import numpy as np
 
 
 class LineEditor(tk.Tk):
@@ -16,18 +19,35 @@ class LineEditor(tk.Tk):
         self.current_algorithm = None
         self.points = []
         self.debug_mode = False
+        self.polyline_mode = False  # вершины копятся до щелчка правой кнопкой
         self.delay = 10
         self.line_width = 1
         self.is_drawing = False
         self.button_states = {}
         self.buttons = {}
-        self.image = Image.new("RGB", (self.canvas_width, self.canvas_height), "white")
-        self.draw = ImageDraw.Draw(self.image)
+        # Кадровый буфер (высота, ширина, RGB); в PIL-изображение переводится только при выводе на холст
+        # Фон с сеткой строится один раз: очистка холста — копирование фона в буфер
+        self.grid_mask = np.zeros((self.canvas_height, self.canvas_width), dtype=bool)
+        self.grid_mask[:, ::10] = True
+        self.grid_mask[::10, :] = True
+        self.background = np.full((self.canvas_height, self.canvas_width, 3), 255, dtype=np.uint8)
+        self.background[self.grid_mask] = ImageColor.getrgb("lightgray")
+        self.framebuffer = self.background.copy()
+        # Постоянное изображение на холсте и прямоугольник изменений (x0, y0, x1, y1) с прошлого вывода
+        self.photo = None
+        self.canvas_image = None
+        self.dirty_rect = None
+        # Трасса шагов алгоритма для отладки и ее пошаговое воспроизведение через after()
+        self.trace = TraceRecorder()
+        self.replay_steps = None
+        self.replay_index = 0
+        self.replay_dropped = 0  # шаги, не поместившиеся в трассу
+        self.replay_color = None
+        self.replay_job = None
         self.algorithm_combobox = None
         self.line_color = "black"
         self.init_ui()
         self.center_window()
-        self.draw_grid()
         self.update_canvas_image()
 
     def center_window(self):
@@ -48,7 +68,7 @@ class LineEditor(tk.Tk):
         self.algorithm_var = tk.StringVar(self)
         self.algorithm_var.set("ЦДА")
         self.algorithm_combobox = ttk.Combobox(button_frame, textvariable=self.algorithm_var,
-                                               values=["ЦДА", "Брезенхем", "Ву"],
+                                               values=["ЦДА", "ЦДА (фикс.)", "Брезенхем", "Ву"],
                                                state="readonly")
         self.algorithm_combobox.bind("<<ComboboxSelected>>", self.on_algorithm_selected)
 
@@ -58,6 +78,12 @@ class LineEditor(tk.Tk):
         self.buttons["debug_btn"] = ttk.Button(button_frame, text="Отладка", command=self.toggle_debug_mode)
         self.buttons["debug_btn"].pack(side="left", padx=5)
 
+        self.buttons["polyline_btn"] = ttk.Button(button_frame, text="Ломаная", command=self.toggle_polyline_mode)
+        self.buttons["polyline_btn"].pack(side="left", padx=5)
+
+        self.buttons["load_paths_btn"] = ttk.Button(button_frame, text="Загрузить пути", command=self.load_paths)
+        self.buttons["load_paths_btn"].pack(side="left", padx=5)
+
         self.buttons["clear_btn"] = ttk.Button(button_frame, text="Очистить", command=self.clear_canvas)
         self.buttons["clear_btn"].pack(side="left", padx=5)
 
@@ -68,6 +94,7 @@ class LineEditor(tk.Tk):
                                 cursor="crosshair")
         self.canvas.pack(pady=10)
         self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.canvas.bind("<Button-3>", self.finish_polyline)
 
         slider_frame = ttk.Frame(self)
         slider_frame.pack(side="bottom", padx=(10, 10), pady=5)
@@ -79,6 +106,8 @@ class LineEditor(tk.Tk):
         self.coord_label.pack(side="left")
         empty_label_right = tk.Label(coord_frame, text="")  # пустой label для выравнивания
         empty_label_right.pack(padx=(150, 0))
+        self.trace_label = tk.Label(coord_frame, text="")  # текущий шаг отладки
+        self.trace_label.pack(side="left")
 
         # Фрейм для ползунков
         slider_frame = ttk.Frame(self)
@@ -128,6 +157,15 @@ class LineEditor(tk.Tk):
             self.draw_grid()
             messagebox.showinfo("Отладка", "Отладочный режим выключен.")
 
+    def toggle_polyline_mode(self):
+        self.polyline_mode = not self.polyline_mode
+        self.points = []
+        self.update_coord_label()
+        if self.polyline_mode:
+            messagebox.showinfo("Ломаная", "Режим ломаной включен. Правая кнопка мыши завершает ломаную.")
+        else:
+            messagebox.showinfo("Ломаная", "Режим ломаной выключен.")
+
     def on_algorithm_selected(self, event):
         selected_algorithm = self.algorithm_var.get()
         self.current_algorithm = selected_algorithm.lower()
@@ -155,31 +193,64 @@ class LineEditor(tk.Tk):
 
         self.update_canvas_image()
 
-        if len(self.points) == 2:
+        if len(self.points) == 2 and not self.polyline_mode:
             self.is_drawing = True
             self.lock_buttons()
             self.draw_line()
             self.points = []
-            self.is_drawing = False
-            self.unlock_buttons()
-            self.update_canvas_image()
+            if self.replay_job is None:
+                self.finish_drawing()
+
+    def finish_polyline(self, event=None):
+        if self.is_drawing or not self.polyline_mode or len(self.points) < 2:
+            return
+        self.is_drawing = True
+        self.lock_buttons()
+        self.draw_paths([self.points])
+        self.points = []
+        self.update_coord_label()
+        if self.replay_job is None:
+            self.finish_drawing()
+
+    def load_paths(self):
+        if not self.current_algorithm:
+            messagebox.showwarning("Внимание", "Выберите алгоритм перед рисованием!")
+            return
+        filename = filedialog.askopenfilename(title="Файл путей", filetypes=[("Текст", "*.txt"), ("Все файлы", "*.*")])
+        if not filename:
+            return
+        try:
+            paths = read_paths(filename)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Ошибка", f"Не удалось прочитать пути: {error}")
+            return
+        self.is_drawing = True
+        self.lock_buttons()
+        self.draw_paths(paths)
+        if self.replay_job is None:
+            self.finish_drawing()
+
+    def finish_drawing(self):
+        self.is_drawing = False
+        self.unlock_buttons()
+        self.update_canvas_image()
 
     def update_coord_label(self):
         coords_str = ", ".join(f"({x}, {y})" for x, y in self.points)
         self.coord_label.config(text=f"Координаты: {coords_str}")
 
     def draw_grid(self):
-        for i in range(0, self.canvas_width, 10):
-            self.draw.line((i, 0, i, self.canvas_height), fill="lightgray")
-        for j in range(0, self.canvas_height, 10):
-            self.draw.line((0, j, self.canvas_width, j), fill="lightgray")
+        # Сетка поверх нарисованного переносится из готового фона
+        np.copyto(self.framebuffer, self.background, where=self.grid_mask[..., None])
+        self.mark_dirty(0, 0, self.canvas_width, self.canvas_height)
 
     def clear_canvas(self):
-        self.image = Image.new("RGB", (self.canvas_width, self.canvas_height), "white")
-        self.draw = ImageDraw.Draw(self.image)
+        self.cancel_replay()
+        self.trace_label.config(text="")
+        np.copyto(self.framebuffer, self.background)
+        self.mark_dirty(0, 0, self.canvas_width, self.canvas_height)
         self.points = []
         self.update_coord_label()
-        self.draw_grid()
         self.is_drawing = False
         self.update_canvas_image()
 
@@ -191,9 +262,26 @@ class LineEditor(tk.Tk):
         for key, btn in self.buttons.items():
             btn.config(state=self.button_states[key])
 
+    def mark_dirty(self, x0, y0, x1, y1):
+        if self.dirty_rect is None:
+            self.dirty_rect = (x0, y0, x1, y1)
+        else:
+            dx0, dy0, dx1, dy1 = self.dirty_rect
+            self.dirty_rect = (min(x0, dx0), min(y0, dy0), max(x1, dx1), max(y1, dy1))
+
     def update_canvas_image(self):
-        self.photo = ImageTk.PhotoImage(self.image)
-        self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+        # Изображение на холсте создается один раз; дальше в него копируется только измененная область
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(Image.fromarray(self.framebuffer, "RGB"))
+            self.canvas_image = self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+            self.dirty_rect = None
+            return
+        if self.dirty_rect is None:
+            return
+        x0, y0, x1, y1 = self.dirty_rect
+        self.dirty_rect = None
+        patch = ImageTk.PhotoImage(Image.fromarray(np.ascontiguousarray(self.framebuffer[y0:y1, x0:x1]), "RGB"))
+        self.tk.call(str(self.photo), "copy", str(patch), "-to", x0, y0)
 
     def draw_line(self):
         x1, y1 = self.points[0]
@@ -207,36 +295,278 @@ class LineEditor(tk.Tk):
             self.update_coord_label()
             return
 
+        # Отсечение по холсту (с запасом на кисть): алгоритм строит только видимую часть
+        clipped = self.clip_to_canvas(x1, y1, x2, y2)
+        if clipped is None:
+            return
+        x1, y1, x2, y2 = clipped
+        if x1 == x2 and y1 == y2:
+            self.draw_pixel(x1, y1, self.line_color)
+            return
+
+        if self.debug_mode:
+            # В режиме отладки шаги алгоритма пишутся в трассу и затем воспроизводятся
+            self.trace.clear()
+            self.trace_segment(x1, y1, x2, y2)
+            self.replay_trace(self.line_color)
+            return
+
+        # Иначе точки идут потоком порциями и рисуются по мере построения
+        if self.current_algorithm == "цда":
+            chunks = iter_dda_line(x1, y1, x2, y2)
+        elif self.current_algorithm == "цда (фикс.)":
+            chunks = iter_fixed_dda_line(x1, y1, x2, y2)
+        elif self.current_algorithm == "брезенхем":
+            chunks = iter_bresenham_line(x1, y1, x2, y2)
+        elif self.current_algorithm == "ву":
+            chunks = iter_wu_line(x1, y1, x2, y2, coverage=True)
+        else:
+            return
+        self.draw_line_segments(chunks, self.line_color)
+
+    def trace_segment(self, x1, y1, x2, y2):
         if self.current_algorithm == "цда":
-            segment = dda_line(x1, y1, x2, y2, debug=self.debug_mode)
-            self.draw_line_segments(segment, self.line_color)
+            dda_line(x1, y1, x2, y2, trace=self.trace)
+        elif self.current_algorithm == "цда (фикс.)":
+            fixed_dda_line(x1, y1, x2, y2, trace=self.trace)
         elif self.current_algorithm == "брезенхем":
-            segment = bresenham_line(x1, y1, x2, y2, debug=self.debug_mode)
-            self.draw_line_segments(segment, self.line_color)
+            bresenham_line(x1, y1, x2, y2, trace=self.trace)
         elif self.current_algorithm == "ву":
-            segment = wu_line(x1, y1, x2, y2, debug=self.debug_mode)
-            self.draw_line_segments(segment, self.line_color)
+            wu_line(x1, y1, x2, y2, trace=self.trace)
 
-    def draw_line_segments(self, segments, color):
-        for x, y in segments:
-            self.draw_pixel(x, y, color)
-            if self.debug_mode:
-                self.update_canvas_image()
-                self.update()
-                self.after(self.delay)
+    def draw_paths(self, paths):
+        # Все отрезки всех ломаных строятся одним пакетом; общие вершины рисуются один раз
+        if self.debug_mode:
+            segments = []
+            for x1, y1, x2, y2 in path_segments(paths)[0].tolist():
+                clipped = self.clip_to_canvas(x1, y1, x2, y2)
+                if clipped is not None and clipped[:2] != clipped[2:]:
+                    segments.append(clipped)
+            # Трасса — единственный источник пикселей при отладке, поэтому буфер расширяется
+            # до точной длины прогона: каждый шаг алгоритма дает ровно один пиксель пакетной версии
+            rasterizer = _BATCH_RASTERIZERS.get(self.current_algorithm)
+            if rasterizer is not None and segments:
+                self.trace.reserve(int(rasterizer(np.array(segments))[-1][-1]))
+            self.trace.clear()
+            for segment in segments:
+                self.trace_segment(*segment)
+            self.replay_trace(self.line_color)
+            return
+
+        xs, ys, coverage = rasterize_paths(paths, self.current_algorithm, self.clip_window())
+        if coverage is None:
+            self.draw_pixels(xs, ys, self.line_color)
+        else:
+            self.blend_pixels(xs, ys, coverage, self.line_color)
+
+    def clip_window(self):
+        # Окно отсечения: точки, кисть которых еще задевает холст
+        lo, hi = self.brush_extent()
+        return -(hi - 1), -(hi - 1), self.canvas_width - 1 - lo, self.canvas_height - 1 - lo
+
+    def clip_to_canvas(self, x1, y1, x2, y2):
+        return clip_line(x1, y1, x2, y2, *self.clip_window())
+
+    def draw_line_segments(self, chunks, color):
+        # Порции (xs, ys) закрашиваются целиком, порции (xs, ys, coverage) смешиваются с фоном
+        for chunk in chunks:
+            if len(chunk) == 3:
+                self.blend_pixels(*chunk, color)
+            else:
+                self.draw_pixels(*chunk, color)
+
+    def replay_trace(self, color):
+        # Пошаговое воспроизведение трассы: каждый шаг — отдельный вызов after(),
+        # поэтому цикл событий Tk не блокируется; задержка берется из ползунка на каждом шаге
+        self.cancel_replay()
+        self.replay_steps = self.trace.snapshot()
+        self.replay_dropped = self.trace.dropped
+        self.replay_index = 0
+        self.replay_color = color
+        if len(self.replay_steps):
+            self.replay_job = self.after(0, self._replay_step)
+
+    def _replay_step(self):
+        step = self.replay_steps[self.replay_index]
+        x, y = int(step["x"]), int(step["y"])
+        if np.isnan(step["intensity"]):
+            self.draw_pixel(x, y, self.replay_color)
+        else:
+            self.blend_pixels([x], [y], [step["intensity"]], self.replay_color)
+        self.update_canvas_image()
+
+        text = f"Шаг {self.replay_index + 1}/{len(self.replay_steps)}: ({x}, {y})"
+        if not np.isnan(step["error"]):
+            text += f", ошибка {step['error']:g}"
+        if not np.isnan(step["intensity"]):
+            text += f", интенсивность {step['intensity']:.2f}"
+        if self.replay_dropped:
+            text += f" (первые {self.replay_dropped} шагов не сохранены)"
+        self.trace_label.config(text=text)
+
+        self.replay_index += 1
+        if self.replay_index < len(self.replay_steps):
+            self.replay_job = self.after(self.delay, self._replay_step)
+        else:
+            self.replay_job = None
+            self.finish_drawing()
+
+    def cancel_replay(self):
+        if self.replay_job is not None:
+            self.after_cancel(self.replay_job)
+            self.replay_job = None
+
+    def brush_extent(self):
+        # Смещения кисти относительно точки: [lo, hi) по каждой оси
+        return -(self.line_width // 2), (self.line_width + 1) // 2
 
     def draw_pixel(self, x, y, color="black"):
-        # Отрисовка пикселя с учетом размера grid_size и толщины линии
-        for i in range(x - self.line_width // 2, x + (self.line_width + 1) // 2):
-            for j in range(y - self.line_width // 2, y + (self.line_width + 1) // 2):
-                if 0 <= i < self.canvas_width and 0 <= j < self.canvas_height:
-                    self.draw.rectangle((i, j, i, j), fill=color)
+        # Отрисовка пикселя с учетом толщины линии: кисть ставится одним срезом буфера
+        lo, hi = self.brush_extent()
+        x0, x1 = max(x + lo, 0), min(x + hi, self.canvas_width)
+        y0, y1 = max(y + lo, 0), min(y + hi, self.canvas_height)
+        if x0 < x1 and y0 < y1:
+            self.framebuffer[y0:y1, x0:x1] = ImageColor.getrgb(color)
+            self.mark_dirty(x0, y0, x1, y1)
+
+    def brush_stamp(self, xs, ys, values):
+        # Отпечаток кисти в ограничивающем прямоугольнике точек (обрезанном по холсту):
+        # значения точек расширяются кистью дилатацией по осям, перекрытия берутся по максимуму.
+        # Возвращает (окно буфера, карта того же размера) или None, если ничего не видно;
+        # окно сразу помечается как измененное.
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        values = np.asarray(values)
+        if xs.size == 0:
+            return None
+        lo, hi = self.brush_extent()
+        x0, x1 = max(int(xs.min()) + lo, 0), min(int(xs.max()) + hi, self.canvas_width)
+        y0, y1 = max(int(ys.min()) + lo, 0), min(int(ys.max()) + hi, self.canvas_height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        self.mark_dirty(x0, y0, x1, y1)
+
+        pad = self.line_width
+        region = np.zeros((y1 - y0 + 2 * pad, x1 - x0 + 2 * pad), dtype=values.dtype)
+        local_x = xs - x0 + pad
+        local_y = ys - y0 + pad
+        inside = (local_x >= 0) & (local_x < region.shape[1]) & (local_y >= 0) & (local_y < region.shape[0])
+        np.maximum.at(region, (local_y[inside], local_x[inside]), values[inside])
+        region = _dilate(_dilate(region, lo, hi, axis=0), lo, hi, axis=1)
+        return (slice(y0, y1), slice(x0, x1)), region[pad:pad + y1 - y0, pad:pad + x1 - x0]
+
+    def draw_pixels(self, xs, ys, color="black"):
+        # Пакетная отрисовка: маска точек расширяется кистью и закрашивается одной операцией
+        stamp = self.brush_stamp(xs, ys, np.ones(len(xs), dtype=bool))
+        if stamp is not None:
+            window, mask = stamp
+            self.framebuffer[window][mask] = ImageColor.getrgb(color)
+
+    def blend_pixels(self, xs, ys, coverage, color="black"):
+        # Сглаживание: цвет смешивается с фоном по покрытию пикселя (альфа-композиция за один проход)
+        stamp = self.brush_stamp(xs, ys, np.asarray(coverage, dtype=np.float32))
+        if stamp is None:
+            return
+        window, alpha = stamp
+        view = self.framebuffer[window]
+        covered = alpha > 0
+        a = alpha[covered][:, None]
+        rgb = np.asarray(ImageColor.getrgb(color), dtype=np.float32)
+        view[covered] = np.rint(view[covered] * (1 - a) + rgb * a).astype(np.uint8)
+
+
+def _dilate(values, lo, hi, axis):
+    # out[i] = max(values[i - lo], ..., values[i - hi + 1]) вдоль оси axis
+    values = np.moveaxis(values, axis, 0)
+    out = np.zeros_like(values)
+    n = values.shape[0]
+    for d in range(lo, hi):
+        if d >= 0:
+            np.maximum(out[d:], values[:n - d], out=out[d:])
+        else:
+            np.maximum(out[:n + d], values[-d:], out=out[:n + d])
+    return np.moveaxis(out, 0, axis)
+
+
+class TraceRecorder:
+    """Кольцевой буфер шагов растеризации: точка, ошибка и интенсивность Ву.
+
+    Неиспользуемые поля хранятся как NaN. При переполнении затираются самые старые шаги;
+    если длина прогона известна заранее, буфер можно расширить методом reserve.
+    """
+
+    step_dtype = np.dtype([("x", np.int32), ("y", np.int32), ("error", np.float64), ("intensity", np.float32)])
 
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self.steps = np.zeros(capacity, dtype=self.step_dtype)
+        self.count = 0
 
-def dda_line(x1, y1, x2, y2, debug=False):
-    if debug:
-        print("Начало построения DDA")
+    def __len__(self):
+        return min(self.count, self.capacity)
 
+    @property
+    def dropped(self):
+        """Число самых старых шагов, затертых при переполнении."""
+        return max(self.count - self.capacity, 0)
+
+    def reserve(self, capacity):
+        """Расширяет буфер до capacity шагов, сохраняя уже записанные."""
+        if capacity <= self.capacity:
+            return
+        kept = self.snapshot()
+        self.capacity = capacity
+        self.steps = np.zeros(capacity, dtype=self.step_dtype)
+        self.steps[:len(kept)] = kept
+        self.count = len(kept)
+
+    def record(self, x, y, error=np.nan, intensity=np.nan):
+        self.steps[self.count % self.capacity] = (x, y, error, intensity)
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+    def snapshot(self):
+        """Копия сохраненных шагов в порядке записи."""
+        if self.count <= self.capacity:
+            return self.steps[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate((self.steps[start:], self.steps[:start]))
+
+
+def clip_line(x1, y1, x2, y2, xmin, ymin, xmax, ymax):
+    """Отсечение отрезка прямоугольником [xmin, xmax] x [ymin, ymax] (Лиан — Барски).
+
+    Возвращает целые концы отсеченного отрезка (неотсеченные концы не меняются) или None,
+    если отрезок целиком вне окна.
+    """
+    dx = x2 - x1
+    dy = y2 - y1
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x1 - xmin), (dx, xmax - x1), (-dy, y1 - ymin), (dy, ymax - y1)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return None
+            t0 = max(t0, t)
+        else:
+            if t < t0:
+                return None
+            t1 = min(t1, t)
+
+    if t0 > 0:
+        x1, y1 = round(x1 + t0 * dx), round(y1 + t0 * dy)
+    if t1 < 1:
+        x2, y2 = round(x2 - (1 - t1) * dx), round(y2 - (1 - t1) * dy)
+    return x1, y1, x2, y2
+
+
+def dda_line(x1, y1, x2, y2, trace=None):
     dx = x2 - x1
     dy = y2 - y1
     steps = max(abs(dx), abs(dy))
@@ -245,24 +575,61 @@ def dda_line(x1, y1, x2, y2, debug=False):
     y_inc = dy / float(steps)
     x = x1
     y = y1
+    y_minor = abs(dx) >= abs(dy)  # в трассу пишется ошибка округления по ведомой оси
     points = []
     for _ in range(int(steps) + 1):
         point = (round(x), round(y))
         points.append(point)
-        if debug:
-            print(f"DDA: {point}")
+        if trace is not None:
+            trace.record(*point, error=(y - point[1]) if y_minor else (x - point[0]))
         x += x_inc
         y += y_inc
 
-    if debug:
-        print("Завершение построения DDA")
     return points
 
 
-def bresenham_line(x1, y1, x2, y2, debug=False):
-    if debug:
-        print("Начало построения Bresenham")
+# ЦДА в целочисленной арифметике с фиксированной точкой (по умолчанию 16.16).
+# Координата хранится как X * 2**frac_bits, приращение округляется к ближайшему
+# один раз, а пиксель получается сдвигом вправо (округление половины вверх).
+# Отличия от ЦДА с плавающей точкой: точные половины округляются вверх, а не к
+# четному, и нет накопления ошибки сложения; концы совпадают, пока отрезок короче
+# 2**frac_bits пикселей.
+
+FIXED_POINT_BITS = 16
+
+
+def _fixed_increment(delta, steps, frac_bits):
+    # delta / steps с frac_bits дробными битами, округление к ближайшему
+    return (2 * (delta << frac_bits) + steps) // (2 * steps)
+
+
+def fixed_dda_line(x1, y1, x2, y2, trace=None, frac_bits=FIXED_POINT_BITS):
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = max(abs(dx), abs(dy), 1)
+
+    x_inc = _fixed_increment(dx, steps, frac_bits)
+    y_inc = _fixed_increment(dy, steps, frac_bits)
+    half = 1 << (frac_bits - 1)
+    mask = (1 << frac_bits) - 1
+    # Половина добавлена заранее, поэтому округление — это просто сдвиг
+    x = (x1 << frac_bits) + half
+    y = (y1 << frac_bits) + half
+    y_minor = abs(dx) >= abs(dy)
+    points = []
+    for _ in range(max(abs(dx), abs(dy)) + 1):
+        point = (x >> frac_bits, y >> frac_bits)
+        points.append(point)
+        if trace is not None:
+            residual = (y & mask) if y_minor else (x & mask)
+            trace.record(*point, error=(residual - half) / (1 << frac_bits))
+        x += x_inc
+        y += y_inc
+
+    return points
 
+
+def bresenham_line(x1, y1, x2, y2, trace=None):
     dx = abs(x2 - x1)
     dy = abs(y2 - y1)
     sx = 1 if x1 < x2 else -1  # направление слева направо если 1
@@ -275,8 +642,8 @@ def bresenham_line(x1, y1, x2, y2, debug=False):
     while True:
         point = (x, y)
         points.append(point)
-        if debug:
-            print(f"Bresenham: {point}")
+        if trace is not None:
+            trace.record(*point, error=err)
         if x == x2 and y == y2:
             break
         e2 = 2 * err
@@ -287,12 +654,10 @@ def bresenham_line(x1, y1, x2, y2, debug=False):
             err += dx
             y += sy
 
-    if debug:
-        print("Завершение построения Bresenham")
     return points
 
 
-def wu_line(x1, y1, x2, y2, debug=False):
+def wu_line(x1, y1, x2, y2, trace=None, coverage=False):
     def ipart(x):
         return int(x)
 
@@ -309,12 +674,9 @@ def wu_line(x1, y1, x2, y2, debug=False):
 
     def plot(x, y, c):
         point = (int(round(x)), int(round(y)))
-        points.append(point)
-        if debug:
-            print(f"Wu: {point}, {round(c, 2)}")
-
-    if debug:
-        print("Начало построения Wu")
+        points.append((*point, c) if coverage else point)
+        if trace is not None:
+            trace.record(*point, intensity=c)
 
     dx = x2 - x1
     dy = y2 - y1
@@ -366,11 +728,403 @@ def wu_line(x1, y1, x2, y2, debug=False):
             plot(ipart(interx) + 1, y, fpart(interx))
             interx += gradient
 
-    if debug:
-        print("Завершение построения Wu")
     return points
 
 
+# Потоковая растеризация: генераторы отдают точки порциями массивов NumPy длиной
+# не более chunk_size (у Ву — не меньше трех пар пикселей), поэтому память не зависит
+# от длины отрезка. Точки совпадают со скалярными функциями и идут в том же порядке.
+
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def iter_dda_line(x1, y1, x2, y2, chunk_size=DEFAULT_CHUNK_SIZE):
+    steps = max(abs(x2 - x1), abs(y2 - y1))
+    x_inc = (x2 - x1) / float(max(steps, 1))
+    y_inc = (y2 - y1) / float(max(steps, 1))
+    x, y = x1, y1
+    for start in range(0, steps + 1, chunk_size):
+        n = min(chunk_size, steps + 1 - start)
+        xs = np.full(n, x_inc)
+        ys = np.full(n, y_inc)
+        xs[0], ys[0] = x, y
+        # Накопление в том же порядке, что и `x += x_inc` в dda_line
+        np.add.accumulate(xs, out=xs)
+        np.add.accumulate(ys, out=ys)
+        x, y = xs[-1] + x_inc, ys[-1] + y_inc
+        yield np.rint(xs).astype(np.int64), np.rint(ys).astype(np.int64)
+
+
+def iter_fixed_dda_line(x1, y1, x2, y2, chunk_size=DEFAULT_CHUNK_SIZE, frac_bits=FIXED_POINT_BITS):
+    steps = max(abs(x2 - x1), abs(y2 - y1))
+    x_inc = _fixed_increment(x2 - x1, max(steps, 1), frac_bits)
+    y_inc = _fixed_increment(y2 - y1, max(steps, 1), frac_bits)
+    half = 1 << (frac_bits - 1)
+    for start in range(0, steps + 1, chunk_size):
+        k = np.arange(start, min(start + chunk_size, steps + 1), dtype=np.int64)
+        yield ((x1 << frac_bits) + half + k * x_inc) >> frac_bits, ((y1 << frac_bits) + half + k * y_inc) >> frac_bits
+
+
+def iter_bresenham_line(x1, y1, x2, y2, chunk_size=DEFAULT_CHUNK_SIZE):
+    dx, dy = abs(x2 - x1), abs(y2 - y1)
+    sx = 1 if x1 < x2 else -1
+    sy = 1 if y1 < y2 else -1
+    major, minor = max(dx, dy), min(dx, dy)
+    for start in range(0, major + 1, chunk_size):
+        k = np.arange(start, min(start + chunk_size, major + 1), dtype=np.int64)
+        # Замкнутая форма шага по ведомой оси (см. bresenham_lines)
+        minor_step = (2 * k * minor + max(major - 1, 0)) // (2 * max(major, 1))
+        if dx >= dy:
+            yield x1 + sx * k, y1 + sy * minor_step
+        else:
+            yield x1 + sx * minor_step, y1 + sy * k
+
+
+def iter_wu_line(x1, y1, x2, y2, chunk_size=DEFAULT_CHUNK_SIZE, coverage=False):
+    if x1 == x2 and y1 == y2:
+        return
+    x_major = abs(x2 - x1) > abs(y2 - y1)
+    u1, v1, u2, v2 = (x1, y1, x2, y2) if x_major else (y1, x1, y2, x2)
+    if u1 > u2:
+        u1, v1, u2, v2 = u2, v2, u1, v1
+    gradient = (v2 - v1) / (u2 - u1)
+
+    # Каждый столбец ведущей оси дает пару пикселей; первая порция начинается с двух концов
+    columns = max(chunk_size // 2, 3)
+    cols_u = np.array([u1, u2], dtype=np.int64)
+    cols_v = np.array([v1, v2], dtype=np.int64)
+    cols_f = np.zeros(2)
+    inter = v1 + gradient
+    start = u1 + 1
+    while True:
+        stop = min(start + columns - len(cols_u), u2)
+        if stop > start:
+            acc = np.full(stop - start, gradient)
+            acc[0] = inter
+            np.add.accumulate(acc, out=acc)
+            inter = acc[-1] + gradient
+            inter_int = np.trunc(acc)
+            cols_u = np.concatenate((cols_u, np.arange(start, stop, dtype=np.int64)))
+            cols_v = np.concatenate((cols_v, inter_int.astype(np.int64)))
+            cols_f = np.concatenate((cols_f, acc - inter_int))
+
+        us = np.repeat(cols_u, 2)
+        vs = np.stack([cols_v, cols_v + 1], axis=1).ravel()
+        xs, ys = (us, vs) if x_major else (vs, us)
+        if coverage:
+            yield xs, ys, np.stack([1 - cols_f, cols_f], axis=1).ravel()
+        else:
+            yield xs, ys
+
+        if stop >= u2:
+            return
+        start = stop
+        cols_u = cols_v = np.empty(0, dtype=np.int64)
+        cols_f = np.empty(0)
+
+
+# Пакетная (векторизованная) растеризация: на вход массив (N, 4) концов отрезков
+# x1, y1, x2, y2, на выход плоские массивы xs, ys и смещения offsets длины N + 1 —
+# пиксели i-го отрезка лежат в xs[offsets[i]:offsets[i + 1]]. Результат попиксельно
+# совпадает со скалярными dda_line / bresenham_line / wu_line.
+
+_ACCUMULATE_BLOCK_ROWS = 256
+
+
+def _as_segments(segments):
+    segments = np.asarray(segments, dtype=np.int64)
+    if segments.ndim == 1 and segments.size == 4:
+        segments = segments.reshape(1, 4)
+    if segments.ndim != 2 or segments.shape[1] != 4:
+        raise ValueError(f"Ожидается массив отрезков формы (N, 4), получено {segments.shape}")
+    return segments
+
+
+def _segment_layout(counts):
+    """Смещения отрезков и локальный номер каждого пикселя внутри своего отрезка."""
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    seg = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(offsets[-1], dtype=np.int64) - offsets[seg]
+    return offsets, seg, local
+
+
+def _accumulate_rows(first, step, counts):
+    """Последовательно складывает first + step + step + ... (counts[i] значений на отрезок).
+
+    Сложение идет в том же порядке, что и в скалярном цикле `x += x_inc`, поэтому
+    ошибки округления совпадают бит в бит. Строки группируются по длине, чтобы
+    выравнивание до прямоугольного блока почти не тратило памяти.
+    """
+    first = np.asarray(first, dtype=np.float64)
+    step = np.asarray(step, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    out = np.empty(offsets[-1], dtype=np.float64)
+
+    order = np.argsort(counts, kind="stable")
+    order = order[counts[order] > 0]
+    for start in range(0, len(order), _ACCUMULATE_BLOCK_ROWS):
+        rows = order[start:start + _ACCUMULATE_BLOCK_ROWS]
+        width = int(counts[rows[-1]])
+        block = np.empty((len(rows), width), dtype=np.float64)
+        block[:, 0] = first[rows]
+        block[:, 1:] = step[rows, None]
+        np.add.accumulate(block, axis=1, out=block)
+        columns = np.arange(width)
+        mask = columns < counts[rows, None]
+        out[(offsets[rows, None] + columns)[mask]] = block[mask]
+    return out
+
+
+def dda_lines(segments):
+    """Пакетный ЦДА. Вырожденный отрезок (точка) дает один пиксель."""
+    segments = _as_segments(segments)
+    x1, y1, x2, y2 = segments.T
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+    safe_steps = np.maximum(steps, 1).astype(np.float64)
+
+    counts = steps + 1
+    offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    xs = np.rint(_accumulate_rows(x1, dx / safe_steps, counts)).astype(np.int64)
+    ys = np.rint(_accumulate_rows(y1, dy / safe_steps, counts)).astype(np.int64)
+    return xs, ys, offsets
+
+
+def fixed_dda_lines(segments, frac_bits=FIXED_POINT_BITS):
+    """Пакетный ЦДА с фиксированной точкой: k-й пиксель считается напрямую как x1 + k * x_inc."""
+    segments = _as_segments(segments)
+    x1, y1, x2, y2 = segments.T
+    steps = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1))
+    x_inc = _fixed_increment(x2 - x1, np.maximum(steps, 1), frac_bits)
+    y_inc = _fixed_increment(y2 - y1, np.maximum(steps, 1), frac_bits)
+    half = 1 << (frac_bits - 1)
+
+    offsets, seg, k = _segment_layout(steps + 1)
+    xs = ((x1[seg] << frac_bits) + half + k * x_inc[seg]) >> frac_bits
+    ys = ((y1[seg] << frac_bits) + half + k * y_inc[seg]) >> frac_bits
+    return xs, ys, offsets
+
+
+def bresenham_lines(segments):
+    """Пакетный Брезенхем в замкнутой форме: смещение по малой оси на k-м шаге
+    равно (2*k*minor + major - 1) // (2*major), что совпадает с ветвлением по ошибке."""
+    segments = _as_segments(segments)
+    x1, y1, x2, y2 = segments.T
+    dx = np.abs(x2 - x1)
+    dy = np.abs(y2 - y1)
+    sx = np.where(x1 < x2, 1, -1)
+    sy = np.where(y1 < y2, 1, -1)
+    major = np.maximum(dx, dy)
+    minor = np.minimum(dx, dy)
+
+    offsets, seg, k = _segment_layout(major + 1)
+    seg_major = major[seg]
+    minor_step = (2 * k * minor[seg] + np.maximum(seg_major - 1, 0)) // (2 * np.maximum(seg_major, 1))
+    x_major = (dx >= dy)[seg]
+    xs = x1[seg] + sx[seg] * np.where(x_major, k, minor_step)
+    ys = y1[seg] + sy[seg] * np.where(x_major, minor_step, k)
+    return xs, ys, offsets
+
+
+def wu_lines(segments, coverage=False):
+    """Пакетный алгоритм Ву в том же порядке, что и wu_line.
+
+    При coverage=True возвращает xs, ys, интенсивности и смещения — как wu_line(..., coverage=True).
+    """
+    segments = _as_segments(segments)
+    x1, y1, x2, y2 = segments.T
+    x_major = np.abs(x2 - x1) > np.abs(y2 - y1)
+
+    # Переходим к осям (u — ведущая, v — ведомая) и упорядочиваем концы по u.
+    u1 = np.where(x_major, x1, y1)
+    v1 = np.where(x_major, y1, x1)
+    u2 = np.where(x_major, x2, y2)
+    v2 = np.where(x_major, y2, x2)
+    swap = u1 > u2
+    u1, u2 = np.where(swap, u2, u1), np.where(swap, u1, u2)
+    v1, v2 = np.where(swap, v2, v1), np.where(swap, v1, v2)
+
+    major = u2 - u1
+    gradient = (v2 - v1) / np.maximum(major, 1).astype(np.float64)
+    interior = np.maximum(major - 1, 0)
+    inter = _accumulate_rows(v1 + gradient, gradient, interior)
+
+    # Столбцы: два конца, затем внутренние u1 + 1 .. u2 - 1; каждый столбец дает пару пикселей.
+    offsets, seg, local = _segment_layout(np.where(major > 0, major + 1, 0))
+    cols_u = np.where(local == 1, u2[seg], u1[seg] + np.maximum(local - 1, 0))
+    cols_v = np.where(local == 1, v2[seg], v1[seg])
+    inner = local >= 2
+    inter_int = np.trunc(inter)
+    cols_v[inner] = inter_int.astype(np.int64)
+
+    us = np.repeat(cols_u, 2)
+    vs = np.stack([cols_v, cols_v + 1], axis=1).ravel()
+    pixel_x_major = np.repeat(x_major[seg], 2)
+    xs = np.where(pixel_x_major, us, vs)
+    ys = np.where(pixel_x_major, vs, us)
+    if not coverage:
+        return xs, ys, offsets * 2
+
+    # Концы лежат точно в узлах сетки: fpart = 0, rfpart = 1
+    cols_f = np.zeros(len(cols_u), dtype=np.float64)
+    cols_f[inner] = inter - inter_int
+    cs = np.stack([1 - cols_f, cols_f], axis=1).ravel()
+    return xs, ys, cs, offsets * 2
+
+
+def clip_lines(segments, xmin, ymin, xmax, ymax):
+    """Пакетный clip_line. Возвращает отсеченные отрезки (M, 4) и маску видимых отрезков длины N."""
+    segments = _as_segments(segments)
+    x1, y1, x2, y2 = segments.T.astype(np.float64)
+    dx = x2 - x1
+    dy = y2 - y1
+    t0 = np.zeros(len(segments))
+    t1 = np.ones(len(segments))
+    visible = np.ones(len(segments), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x1 - xmin), (dx, xmax - x1), (-dy, y1 - ymin), (dy, ymax - y1)):
+            visible &= (p != 0) | (q >= 0)
+            t = q / p
+            t0 = np.where(p < 0, np.maximum(t0, t), t0)
+            t1 = np.where(p > 0, np.minimum(t1, t), t1)
+    visible &= t0 <= t1
+
+    clipped = segments.copy()
+    start = visible & (t0 > 0)
+    end = visible & (t1 < 1)
+    clipped[start, 0] = np.rint(x1 + t0 * dx)[start]
+    clipped[start, 1] = np.rint(y1 + t0 * dy)[start]
+    clipped[end, 2] = np.rint(x2 - (1 - t1) * dx)[end]
+    clipped[end, 3] = np.rint(y2 - (1 - t1) * dy)[end]
+    return clipped[visible], visible
+
+
+_BATCH_RASTERIZERS = {
+    "цда": dda_lines,
+    "цда (фикс.)": fixed_dda_lines,
+    "брезенхем": bresenham_lines,
+    "ву": wu_lines,
+}
+
+
+def path_segments(paths):
+    """Отрезки (N, 4) всех ломаных и маска «начало отрезка — общая вершина с предыдущим».
+
+    Повторяющиеся подряд вершины пропускаются, ломаные из одной вершины не дают отрезков.
+    """
+    segments = []
+    shared = []
+    for path in paths:
+        path = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+        if len(path):
+            path = path[np.r_[True, (path[1:] != path[:-1]).any(axis=1)]]
+        if len(path) < 2:
+            continue
+        segments.append(np.hstack((path[:-1], path[1:])))
+        flags = np.ones(len(path) - 1, dtype=bool)
+        flags[0] = False
+        shared.append(flags)
+    if not segments:
+        return np.empty((0, 4), dtype=np.int64), np.empty(0, dtype=bool)
+    return np.concatenate(segments), np.concatenate(shared)
+
+
+def rasterize_paths(paths, algorithm, window=None):
+    """Растеризует ломаные одним пакетом, выводя общие вершины соседних отрезков один раз.
+
+    algorithm — "цда", "цда (фикс.)", "брезенхем" или "ву"; window — окно отсечения (xmin, ymin, xmax, ymax).
+    Возвращает xs, ys и покрытие пикселей (для Ву, иначе None).
+    """
+    segments, shared = path_segments(paths)
+    if window is not None:
+        clipped, visible = clip_lines(segments, *window)
+        # Вершина остается общей, только если предыдущий отрезок ломаной виден
+        # и после отсечения кончается там же, где начинается текущий
+        index = np.flatnonzero(visible)
+        follows = np.zeros(len(index), dtype=bool)
+        follows[1:] = (index[1:] == index[:-1] + 1) & (clipped[:-1, 2:] == clipped[1:, :2]).all(axis=1)
+        shared = shared[visible] & follows
+        segments = clipped
+
+    coverage = None
+    if algorithm == "ву":
+        xs, ys, coverage, offsets = wu_lines(segments, coverage=True)
+        # У Ву начальная вершина — первая или вторая пара пикселей, смотря по порядку концов
+        x1, y1, x2, y2 = segments.T
+        swapped = np.where(np.abs(x2 - x1) > np.abs(y2 - y1), x1 > x2, y1 > y2)
+        first = offsets[:-1] + 2 * swapped
+        # Отрезок из одной точки (например, после отсечения) у Ву не дает пикселей:
+        # тогда вершина не выведена ни одним из соседей и не может считаться общей
+        nonempty = offsets[1:] > offsets[:-1]
+        shared &= nonempty
+        shared[1:] &= nonempty[:-1]
+        drop = np.concatenate((first[shared], first[shared] + 1))
+    else:
+        xs, ys, offsets = _BATCH_RASTERIZERS[algorithm](segments)
+        drop = offsets[:-1][shared]
+
+    keep = np.ones(len(xs), dtype=bool)
+    keep[drop] = False
+    if coverage is not None:
+        coverage = coverage[keep]
+    return xs[keep], ys[keep], coverage
+
+
+def read_paths(filename):
+    """Читает пути из текстового файла: одна ломаная в строке, «x1 y1 x2 y2 ...» (через пробелы
+    или запятые); пустые строки и строки с # пропускаются."""
+    paths = []
+    with open(filename, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            values = [int(round(float(v))) for v in line.replace(",", " ").split()]
+            if len(values) % 2:
+                raise ValueError(f"нечетное число координат в строке: {line}")
+            paths.append(list(zip(values[::2], values[1::2])))
+    return paths
+
+
+def benchmark_dda(count=2000, size=600, repeat=3, seed=0):
+    """Сравнивает ЦДА с плавающей и с фиксированной точкой на случайных отрезках.
+
+    Возвращает лучшее время (с) каждого варианта и долю пикселей, в которых они расходятся.
+    """
+    rng = np.random.default_rng(seed)
+    segments = rng.integers(0, size, size=(count, 4))
+    segments = segments[(segments[:, :2] != segments[:, 2:]).any(axis=1)]
+    as_tuples = segments.tolist()
+
+    def best(func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    results = {
+        "dda_line": best(lambda: [dda_line(*s) for s in as_tuples]),
+        "fixed_dda_line": best(lambda: [fixed_dda_line(*s) for s in as_tuples]),
+        "dda_lines": best(lambda: dda_lines(segments)),
+        "fixed_dda_lines": best(lambda: fixed_dda_lines(segments)),
+    }
+    float_xs, float_ys, _ = dda_lines(segments)
+    fixed_xs, fixed_ys, _ = fixed_dda_lines(segments)
+    results["mismatch"] = float(np.mean((float_xs != fixed_xs) | (float_ys != fixed_ys)))
+    return results
+
+
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        for name, value in benchmark_dda().items():
+            print(f"{name}: {value:.6f}")
+        sys.exit()
     app = LineEditor()
     app.mainloop()
\ No newline at end of file
@@ -1,7 +1,29 @@
 
 import tkinter as tk
 from tkinter import ttk, colorchooser, messagebox
+import functools
+import math
 import time
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageTk, ImageColor
+
+
+def _profiled(phase):
+    # Хук статистики: при включенной статистике время вызова добавляется к фазе phase
+    # (в миллисекундах); при выключенной стоит одну проверку флага.
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.stats_enabled:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.render_stats[phase] += (time.perf_counter() - start) * 1000
+        return wrapper
+    return decorate
 
 
 class PaintApp(tk.Tk):
@@ -23,8 +45,16 @@ class PaintApp(tk.Tk):
         self.selected_figure = "Окружность"  # Тип фигуры по умолчанию
         self.grid_visible = True
         self.grid_step = 10
+        self.use_pixel_buffer = True  # точки пишутся в буфер, а не отдельными овалами
+        self.fill_figures = False  # окружность и эллипс заливаются горизонтальными отрезками
+        self.figure_cache = FigureCache()  # смещения точек уже построенных фигур
+        self.animations = []  # генераторы шагов отладочной анимации, идущих одновременно
+        self.animation_job = None
+        self.stats_enabled = False  # сбор счетчиков отрисовки для строки состояния
+        self.render_stats = dict.fromkeys(("generated", "clipped", "algorithm", "draw"), 0)
 
         self._setup_ui()
+        self._init_pixel_buffer()
         self._center_window()
         self._draw_grid()  # Сетка при запуске
 
@@ -39,103 +69,161 @@ class PaintApp(tk.Tk):
         y_coord = (screen_height // 2) - (window_height // 2)
         self.geometry(f"{window_width}x{window_height}+{x_coord}+{y_coord}")
 
-    def _draw_grid(self):
-        # Отображает сетку на холсте.
+    def _init_pixel_buffer(self):
+        # Создает буфер пикселей (высота, ширина, RGB) и единственное изображение на холсте,
+        # в которое переносится только измененная область буфера.
+        self.background = np.full((self.draw_area_height, self.draw_area_width, 3), 255, dtype=np.uint8)
         if self.grid_visible:
-            for i in range(self.grid_step, self.draw_area_width, self.grid_step):
-                self.canvas.create_line(i, 0, i, self.draw_area_height, fill="lightgray", tags="grid_line")
-            for i in range(self.grid_step, self.draw_area_height, self.grid_step):
-                self.canvas.create_line(0, i, self.draw_area_width, i, fill="lightgray", tags="grid_line")
+            grid_color = ImageColor.getrgb("lightgray")
+            self.background[:, self.grid_step::self.grid_step] = grid_color
+            self.background[self.grid_step::self.grid_step, :] = grid_color
+        self.pixels = self.background.copy()
+        self.dirty_rect = None
+        self.photo = ImageTk.PhotoImage(Image.fromarray(self.pixels, "RGB"))
+        self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW, tags="pixel_buffer")
+
+    def _draw_grid(self):
+        # Отображает сетку на холсте: сетка хранится в фоне буфера пикселей.
+        np.copyto(self.pixels, self.background)
+        self._mark_dirty(0, 0, self.draw_area_width, self.draw_area_height)
+        self._flush_pixels()
 
     def clear_canvas(self):
         # Очищает холст от всех изображений и перерисовывает сетку.
-        self.canvas.delete("all")
+        self._cancel_animations()
+        self.canvas.delete("figure")
         self._draw_grid()
 
-    def draw_point(self, x, y):
+    def _mark_dirty(self, x0, y0, x1, y1):
+        # Расширяет прямоугольник изменений буфера с момента последнего вывода.
+        if self.dirty_rect is None:
+            self.dirty_rect = (x0, y0, x1, y1)
+        else:
+            dx0, dy0, dx1, dy1 = self.dirty_rect
+            self.dirty_rect = (min(x0, dx0), min(y0, dy0), max(x1, dx1), max(y1, dy1))
+
+    def _flush_pixels(self):
+        # Переносит измененную область буфера в изображение на холсте одним обновлением.
+        if self.dirty_rect is None:
+            return
+        x0, y0, x1, y1 = self.dirty_rect
+        self.dirty_rect = None
+        patch = ImageTk.PhotoImage(Image.fromarray(np.ascontiguousarray(self.pixels[y0:y1, x0:x1]), "RGB"))
+        self.tk.call(str(self.photo), "copy", str(patch), "-to", x0, y0)
+
+    def _toggle_pixel_buffer(self):
+        # Переключает вывод точек: буфер пикселей или отдельные овалы на холсте.
+        self.use_pixel_buffer = self.pixel_buffer_var.get()
+
+    def draw_point(self, x, y, color=None):
         # Рисует единичную точку на холсте.
-        self.canvas.create_oval(x, y, x + 1, y + 1, fill=self.selected_color, outline="")
+        color = color or self.selected_color
+        if self.use_pixel_buffer:
+            x, y = int(round(x)), int(round(y))
+            if 0 <= x < self.draw_area_width and 0 <= y < self.draw_area_height:
+                self.pixels[y, x] = ImageColor.getrgb(color)
+                self._mark_dirty(x, y, x + 1, y + 1)
+        else:
+            self.canvas.create_oval(x, y, x + 1, y + 1, fill=color, outline="", tags="figure")
+
+    def _toggle_fill(self):
+        # Переключает заливку окружности и эллипса.
+        self.fill_figures = self.fill_var.get()
+
+    def _draw_span(self, y, x_left, x_right, color):
+        # Рисует горизонтальный отрезок [x_left, x_right] строки y (уже обрезанный по холсту).
+        if self.use_pixel_buffer:
+            self.pixels[y, x_left:x_right + 1] = ImageColor.getrgb(color)
+            self._mark_dirty(x_left, y, x_right + 1, y + 1)
+        else:
+            self.canvas.create_line(x_left, y, x_right + 1, y, fill=color, tags="figure")
+
+    @_profiled("draw")
+    def fill_spans(self, x0, y0, spans):
+        # Заливает фигуру по строкам: spans — массив (dy, x_left, x_right) относительно центра,
+        # каждая строка записывается одним срезом буфера.
+        ys = y0 + spans[:, 0]
+        x_left = np.maximum(x0 + spans[:, 1], 0)
+        x_right = np.minimum(x0 + spans[:, 2], self.draw_area_width - 1)
+        visible = (ys >= 0) & (ys < self.draw_area_height) & (x_left <= x_right)
+        if self.stats_enabled:
+            generated = int((spans[:, 2] - spans[:, 1] + 1).sum())
+            self.render_stats["generated"] += generated
+            self.render_stats["clipped"] += generated - int((x_right - x_left + 1)[visible].sum())
+        rows = list(zip(ys[visible].tolist(), x_left[visible].tolist(), x_right[visible].tolist()))
         if self.is_debugging:
-            print(f"{self.selected_figure.capitalize()}: (x={x}, y={y})")
-        self._pause_if_debugging()
+            self._start_animation(self._animate_spans(rows, self.selected_color))
+            return
+        for y, left, right in rows:
+            self._draw_span(y, left, right, self.selected_color)
+
+    @_profiled("draw")
+    def draw_points(self, xs, ys):
+        # Рисует набор точек: одной операцией в буфер, по одной (режим овалов)
+        # или пошаговой анимацией в режиме отладки.
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        if self.stats_enabled:
+            self.render_stats["generated"] += len(xs)
+            self.render_stats["clipped"] += int(((xs < 0) | (xs >= self.draw_area_width) |
+                                                 (ys < 0) | (ys >= self.draw_area_height)).sum())
+        if self.is_debugging:
+            self._start_animation(self._animate_points(xs.tolist(), ys.tolist(), self.selected_color,
+                                                       self.selected_figure))
+            return
+        if not self.use_pixel_buffer:
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                self.draw_point(x, y)
+            return
+        visible = (xs >= 0) & (xs < self.draw_area_width) & (ys >= 0) & (ys < self.draw_area_height)
+        if visible.any():
+            xs, ys = xs[visible], ys[visible]
+            self.pixels[ys, xs] = ImageColor.getrgb(self.selected_color)
+            self._mark_dirty(int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+
+    @_profiled("algorithm")
+    def _figure_points(self, figure, size1, size2=None, extent=None):
+        # Смещения точек фигуры из LRU-кэша; при промахе фигура строится заново.
+        return self.figure_cache.get((figure, size1, size2, extent),
+                                     lambda: figure_points(figure, size1, size2, extent))
+
+    def _visible_extent(self, figure, x0, y0, size1):
+        # Видимые пределы незамкнутой фигуры с центром (x0, y0), округленные вверх до VIEW_QUANTUM,
+        # чтобы фигуры в соседних точках попадали в один элемент кэша.
+        x_limit, y_limit = visible_extent(figure, x0, y0, size1, self.draw_area_width, self.draw_area_height)
+        return -(-x_limit // VIEW_QUANTUM) * VIEW_QUANTUM, -(-y_limit // VIEW_QUANTUM) * VIEW_QUANTUM
+
+    @_profiled("algorithm")
+    def _figure_spans(self, figure, size1, size2=None):
+        # Строки заливки фигуры из того же LRU-кэша.
+        return self.figure_cache.get((f"{figure} (заливка)", size1, size2),
+                                     lambda: FIGURE_SPANS[figure](size1, size2))
 
     def draw_circle(self, x0, y0, radius):
         # Рисует окружность, используя алгоритм Брезенхема.
-        x, y, delta = 0, radius, 3 - 2 * radius
-        while x <= y:
-            for dx, dy in [(x, y), (y, x), (-y, x), (-x, y), (-x, -y), (-y, -x), (y, -x), (x, -y)]:
-                self.draw_point(x0 + dx, y0 + dy)
-            x += 1
-            if delta > 0:
-                y -= 1
-                delta += 4 * (x - y) + 10
-            else:
-                delta += 4 * x + 6
+        if self.fill_figures:
+            self.fill_spans(x0, y0, self._figure_spans("Окружность", radius))
+            return
+        points = self._figure_points("Окружность", radius)
+        self.draw_points(x0 + points[:, 0], y0 + points[:, 1])
 
     def draw_ellipse(self, x0, y0, a, b):
         # Рисует эллипс, используя алгоритм построения.
-        x, y = 0, b
-        d1 = b ** 2 - a ** 2 * b + 0.25 * a ** 2
-
-        while (a ** 2) * (y - 0.5) > (b ** 2) * (x + 1):
-            for dx, dy in [(x, y), (-x, y), (x, -y), (-x, -y)]:
-                self.draw_point(x0 + dx, y0 + dy)
-            x += 1
-            if d1 < 0:
-                d1 += (2 * b ** 2) * x + b ** 2
-            else:
-                y -= 1
-                d1 += (2 * b ** 2) * x - (2 * a ** 2) * y + b ** 2
-
-        d2 = b ** 2 * (x + 0.5) ** 2 + a ** 2 * (y - 1) ** 2 - a ** 2 * b ** 2
-        while y >= 0:
-            for dx, dy in [(x, y), (-x, y), (x, -y), (-x, -y)]:
-                self.draw_point(x0 + dx, y0 + dy)
-            y -= 1
-            if d2 > 0:
-                d2 += a ** 2 - 2 * a ** 2 * y
-            else:
-                x += 1
-                d2 += (2 * b ** 2) * x - (2 * a ** 2) * y + a ** 2
+        if self.fill_figures:
+            self.fill_spans(x0, y0, self._figure_spans("Эллипс", a, b))
+            return
+        points = self._figure_points("Эллипс", a, b)
+        self.draw_points(x0 + points[:, 0], y0 + points[:, 1])
 
     def draw_hyperbola(self, x0, y0, a, b):
         # Рисует гиперболу, используя алгоритм построения.
-
-        x, y = a, 0
-
-        d1 = b ** 2 * (x + 0.5) ** 2 - a ** 2 * (y + 1) ** 2 - a ** 2 * b ** 2
-        while (b ** 2) * (x - 0.5) > (a ** 2) * (y + 1):
-            for dx, dy in [(x, y), (-x, y), (x, -y), (-x, -y)]:
-                self.draw_point(x0 + dx, y0 + dy)
-
-            y += 1
-            if d1 < 0:
-                d1 += (2 * a ** 2) * y + a ** 2
-            else:
-                x += 1
-                d1 += (2 * a ** 2) * y - (2 * b ** 2) * x + a ** 2
-
-        d2 = b ** 2 * (x + 1) ** 2 - a ** 2 * (y + 0.5) ** 2 - a ** 2 * b ** 2
-        while x < 200:
-            for dx, dy in [(x, y), (-x, y), (x, -y), (-x, -y)]:
-                self.draw_point(x0 + dx, y0 + dy)
-
-            x += 1
-            if d2 > 0:
-                d2 += b ** 2 - (2 * b ** 2) * x
-            else:
-                y += 1
-                d2 += (2 * a ** 2) * y - (2 * b ** 2) * x + b ** 2
+        points = self._figure_points("Гипербола", a, b, extent=self._visible_extent("Гипербола", x0, y0, a))
+        self.draw_points(x0 + points[:, 0], y0 + points[:, 1])
 
     def draw_parabola(self, x0, y0, p):
         # Рисует параболу, вычисляя координаты точек.
-        step = 1
-        x = 0
-        while x <= 200:
-            y = (x ** 2) / (4 * p)
-            self.draw_point(x0 + x, y0 - y)
-            self.draw_point(x0 - x, y0 - y)
-            x += step
+        points = self._figure_points("Парабола", p, extent=self._visible_extent("Парабола", x0, y0, p))
+        self.draw_points(x0 + points[:, 0], y0 + points[:, 1])
 
     def _setup_ui(self):
         # Настраивает пользовательский интерфейс, создавая и размещая элементы.
@@ -166,6 +254,24 @@ class PaintApp(tk.Tk):
         self.color_button = ttk.Button(button_panel, text="Выбрать цвет", command=self._choose_color)
         self.color_button.pack(side="left", padx=5)
 
+        # Переключатель вывода в буфер пикселей
+        self.pixel_buffer_var = tk.BooleanVar(value=self.use_pixel_buffer)
+        self.pixel_buffer_check = ttk.Checkbutton(button_panel, text="Буфер", variable=self.pixel_buffer_var,
+                                                  command=self._toggle_pixel_buffer)
+        self.pixel_buffer_check.pack(side="left", padx=5)
+
+        # Переключатель заливки окружности и эллипса
+        self.fill_var = tk.BooleanVar(value=self.fill_figures)
+        self.fill_check = ttk.Checkbutton(button_panel, text="Заливка", variable=self.fill_var,
+                                          command=self._toggle_fill)
+        self.fill_check.pack(side="left", padx=5)
+
+        # Переключатель строки статистики отрисовки
+        self.stats_var = tk.BooleanVar(value=self.stats_enabled)
+        self.stats_check = ttk.Checkbutton(button_panel, text="Статистика", variable=self.stats_var,
+                                           command=self._toggle_stats)
+        self.stats_check.pack(side="left", padx=5)
+
         # Фрейм для размеров справа от кнопок
         right_panel = ttk.Frame(button_panel)
         right_panel.pack(side="left", padx=5)
@@ -179,6 +285,10 @@ class PaintApp(tk.Tk):
         self.canvas.pack(pady=10)
         self.canvas.bind("<Button-1>", self._on_canvas_click)
 
+        # Строка состояния со статистикой последней фигуры
+        self.stats_label = ttk.Label(self, text="")
+        self.stats_label.pack(side="top")
+
         # Фрейм для слайдера скорости отладки
         slider_panel = ttk.Frame(self)
         slider_panel.pack(side="bottom", padx=(10, 10), pady=5)
@@ -208,6 +318,26 @@ class PaintApp(tk.Tk):
         # Обрабатывает выбор типа фигуры из выпадающего списка.
         self.selected_figure = self.figure_selector.get()
 
+    def _toggle_stats(self):
+        # Включает или выключает сбор статистики отрисовки.
+        self.stats_enabled = self.stats_var.get()
+        self.stats_label.config(text="Статистика: нарисуйте фигуру" if self.stats_enabled else "")
+
+    def _reset_stats(self):
+        # Обнуляет счетчики перед построением очередной фигуры.
+        for key in self.render_stats:
+            self.render_stats[key] = 0
+
+    def _show_stats(self):
+        # Выводит счетчики последней фигуры в строку состояния.
+        stats = self.render_stats
+        cache = self.figure_cache.stats()
+        self.stats_label.config(
+            text=f"Пикселей: {stats['generated']} (отсечено {stats['clipped']}) | "
+                 f"элементов холста: {len(self.canvas.find_all())} | "
+                 f"алгоритм: {stats['algorithm']:.2f} мс | отрисовка: {stats['draw']:.2f} мс | "
+                 f"кэш: {cache['hits']} попад. / {cache['misses']} пром.")
+
     def _toggle_debug_mode(self):
         # Переключает режим отладки и отображает соответствующее сообщение.
         self.is_debugging = not self.is_debugging
@@ -226,11 +356,45 @@ class PaintApp(tk.Tk):
         # Обновляет значение задержки для режима отладки на основе положения слайдера.
         self.debug_pause = int(501 - float(value))
 
-    def _pause_if_debugging(self):
-        # Приостанавливает выполнение программы в режиме отладки для визуализации.
-        if self.is_debugging:
-            self.update()  # Обновляем окно
-            time.sleep(self.debug_pause / 1000)
+    def _animate_points(self, xs, ys, color, figure):
+        # Генератор шагов отладочной анимации: одна точка фигуры на шаг.
+        for x, y in zip(xs, ys):
+            self.draw_point(x, y, color)
+            print(f"{figure.capitalize()}: (x={x}, y={y})")
+            yield
+
+    def _animate_spans(self, rows, color):
+        # Генератор шагов отладочной анимации заливки: одна строка на шаг.
+        for y, left, right in rows:
+            self._draw_span(y, left, right, color)
+            yield
+
+    def _start_animation(self, steps):
+        # Добавляет анимацию к уже идущим и запускает планировщик, если он стоит.
+        self.animations.append(steps)
+        if self.animation_job is None:
+            self.animation_job = self.after(0, self._run_animations)
+
+    def _run_animations(self):
+        # Делает по одному шагу каждой анимации и планирует следующий вызов через after(),
+        # поэтому цикл событий Tk не блокируется, а задержка берется из слайдера на каждом шаге.
+        for steps in list(self.animations):
+            try:
+                next(steps)
+            except StopIteration:
+                self.animations.remove(steps)
+        self._flush_pixels()
+        if self.animations:
+            self.animation_job = self.after(self.debug_pause, self._run_animations)
+        else:
+            self.animation_job = None
+
+    def _cancel_animations(self):
+        # Останавливает все анимации (при очистке холста).
+        self.animations.clear()
+        if self.animation_job is not None:
+            self.after_cancel(self.animation_job)
+            self.animation_job = None
 
     def _get_figure_sizes(self):
         # Извлекает размеры фигуры из полей ввода и возвращает их.
@@ -249,21 +413,302 @@ class PaintApp(tk.Tk):
             return
 
         self.is_drawing = True
-        size1, size2 = self._get_figure_sizes()
-
-        if self.selected_figure == "Окружность":
-            self.draw_circle(event.x, event.y, size1)
-        elif self.selected_figure == "Эллипс":
-            self.draw_ellipse(event.x, event.y, size1, size2)
-        elif self.selected_figure == "Гипербола":
-            if size1 < size2:
-                messagebox.showerror("Ошибка", "Некорректные размеры: a<b")
+        try:
+            size1, size2 = self._get_figure_sizes()
+            if self.stats_enabled:
+                self._reset_stats()
+
+            if self.selected_figure == "Окружность":
+                self.draw_circle(event.x, event.y, size1)
+            elif self.selected_figure == "Эллипс":
+                self.draw_ellipse(event.x, event.y, size1, size2)
+            elif self.selected_figure == "Гипербола":
+                if size1 < size2:
+                    messagebox.showerror("Ошибка", "Некорректные размеры: a<b")
+                else:
+                    self.draw_hyperbola(event.x, event.y, size1, size2)
+            elif self.selected_figure == "Парабола":
+                self.draw_parabola(event.x, event.y, size1)
+
+            if self.stats_enabled:
+                start = time.perf_counter()
+                self._flush_pixels()  # одно обновление изображения на фигуру
+                self.render_stats["draw"] += (time.perf_counter() - start) * 1000
+                self._show_stats()
             else:
-                self.draw_hyperbola(event.x, event.y, size1, size2)
-        elif self.selected_figure == "Парабола":
-            self.draw_parabola(event.x, event.y, size1)
+                self._flush_pixels()  # одно обновление изображения на фигуру
+        finally:
+            # Ошибка построения не должна блокировать последующие клики
+            self.is_drawing = False
 
-        self.is_drawing = False
+
+# Алгоритмы построения фигур без привязки к Tk. Каждый возвращает массив (n, 2)
+# смещений точек относительно центра фигуры в порядке обхода исходного алгоритма:
+# строится одна октанта (четверть, половина), остальное получается симметрией
+# через broadcasting NumPy.
+
+# Восьмикратная симметрия окружности: (x, y), (y, x), (-y, x), (-x, y), (-x, -y), (-y, -x), (y, -x), (x, -y)
+OCTANT_SWAP = np.array([0, 1, 1, 0, 0, 1, 1, 0])
+OCTANT_SIGNS = np.array([[1, 1], [1, 1], [-1, 1], [-1, 1], [-1, -1], [-1, -1], [1, -1], [1, -1]])
+# Четырехкратная симметрия: (x, y), (-x, y), (x, -y), (-x, -y)
+QUADRANT_SIGNS = np.array([[1, 1], [-1, 1], [1, -1], [-1, -1]])
+# Парабола симметрична относительно вертикальной оси и строится вверх: (x, -y), (-x, -y)
+HALF_SIGNS = np.array([[1, -1], [-1, -1]])
+
+
+def _as_points(points):
+    return np.array(points, dtype=np.int64).reshape(-1, 2)
+
+
+def expand_octants(octant):
+    # (n, 2) -> (8n, 2): для каждой точки октанты восемь симметричных точек подряд
+    pairs = np.stack([octant, octant[:, ::-1]], axis=1)
+    return (pairs[:, OCTANT_SWAP] * OCTANT_SIGNS).reshape(-1, 2)
+
+
+def expand_quadrants(quadrant):
+    return (quadrant[:, None, :] * QUADRANT_SIGNS).reshape(-1, 2)
+
+
+def expand_halves(half):
+    return (half[:, None, :] * HALF_SIGNS).reshape(-1, 2)
+
+
+def circle_octant(radius):
+    # Октанта окружности по алгоритму Брезенхема (от (0, r) до x = y).
+    points = []
+    x, y, delta = 0, radius, 3 - 2 * radius
+    while x <= y:
+        points.append((x, y))
+        x += 1
+        if delta > 0:
+            y -= 1
+            delta += 4 * (x - y) + 10
+        else:
+            delta += 4 * x + 6
+    return _as_points(points)
+
+
+def ellipse_quadrant(a, b):
+    # Четверть эллипса: область с пологим наклоном, затем с крутым.
+    points = []
+    x, y = 0, b
+    d1 = b ** 2 - a ** 2 * b + 0.25 * a ** 2
+    while (a ** 2) * (y - 0.5) > (b ** 2) * (x + 1):
+        points.append((x, y))
+        x += 1
+        if d1 < 0:
+            d1 += (2 * b ** 2) * x + b ** 2
+        else:
+            y -= 1
+            d1 += (2 * b ** 2) * x - (2 * a ** 2) * y + b ** 2
+
+    d2 = b ** 2 * (x + 0.5) ** 2 + a ** 2 * (y - 1) ** 2 - a ** 2 * b ** 2
+    while y >= 0:
+        points.append((x, y))
+        y -= 1
+        if d2 > 0:
+            d2 += a ** 2 - 2 * a ** 2 * y
+        else:
+            x += 1
+            d2 += (2 * b ** 2) * x - (2 * a ** 2) * y + a ** 2
+    return _as_points(points)
+
+
+def hyperbola_quadrant(a, b, x_limit=199, y_limit=math.inf):
+    # Четверть правой ветви гиперболы: от вершины (a, 0) вверх, затем вправо,
+    # пока точка не выйдет за пределы |dx| <= x_limit, |dy| <= y_limit.
+    points = []
+    x, y = a, 0
+    d1 = b ** 2 * (x + 0.5) ** 2 - a ** 2 * (y + 1) ** 2 - a ** 2 * b ** 2
+    while (b ** 2) * (x - 0.5) > (a ** 2) * (y + 1) and x <= x_limit and y <= y_limit:
+        points.append((x, y))
+        y += 1
+        if d1 < 0:
+            d1 += (2 * a ** 2) * y + a ** 2
+        else:
+            x += 1
+            d1 += (2 * a ** 2) * y - (2 * b ** 2) * x + a ** 2
+
+    d2 = b ** 2 * (x + 1) ** 2 - a ** 2 * (y + 0.5) ** 2 - a ** 2 * b ** 2
+    while x <= x_limit and y <= y_limit:
+        points.append((x, y))
+        x += 1
+        if d2 > 0:
+            d2 += b ** 2 - (2 * b ** 2) * x
+        else:
+            y += 1
+            d2 += (2 * a ** 2) * y - (2 * b ** 2) * x + b ** 2
+    return _as_points(points)
+
+
+def parabola_half(p, x_limit=200, y_limit=math.inf):
+    # Правая половина параболы y = x^2 / (4p) в пределах |dx| <= x_limit, |dy| <= y_limit.
+    # Пока наклон не больше 1 (x <= 2|p|), шаг идет по x, дальше — по y с x = sqrt(4|p|y),
+    # поэтому на крутых участках не остается разрывов.
+    if p == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    q = abs(p)
+    x_end = min(x_limit, math.sqrt(4 * q * y_limit))
+    xs = np.arange(0, math.floor(min(2 * q, x_end)) + 1)
+    ys = np.rint(xs ** 2 / (4 * q))
+    if x_end > 2 * q:
+        # В точке смены оси y = q; дальше y растет до предела по y или по x
+        steep_ys = np.arange(q + 1, math.floor(min(y_limit, x_end ** 2 / (4 * q))) + 1)
+        xs = np.concatenate([xs, np.rint(np.sqrt(4 * q * steep_ys))])
+        ys = np.concatenate([ys, steep_ys])
+    return np.stack([xs, np.copysign(ys, p)], axis=1).astype(np.int64)
+
+
+def circle_points(radius):
+    return expand_octants(circle_octant(radius))
+
+
+def ellipse_points(a, b):
+    return expand_quadrants(ellipse_quadrant(a, b))
+
+
+def hyperbola_points(a, b, x_limit=199, y_limit=math.inf):
+    return expand_quadrants(hyperbola_quadrant(a, b, x_limit, y_limit))
+
+
+def parabola_points(p, x_limit=200, y_limit=math.inf):
+    return expand_halves(parabola_half(p, x_limit, y_limit))
+
+
+def quadrant_spans(quadrant):
+    # Строки заливки по точкам контура в первой четверти: полуширина строки |dy| —
+    # наибольший |dx| среди точек этой строки. Возвращает (dy, x_left, x_right) для dy = -h..h.
+    if len(quadrant) == 0:
+        return np.empty((0, 3), dtype=np.int64)
+    height = int(quadrant[:, 1].max())
+    half_width = np.zeros(height + 1, dtype=np.int64)
+    np.maximum.at(half_width, quadrant[:, 1], quadrant[:, 0])
+    dy = np.arange(-height, height + 1)
+    width = half_width[np.abs(dy)]
+    return np.stack([dy, -width, width], axis=1)
+
+
+def circle_spans(radius):
+    # Октанта отражается относительно x = y, чтобы получить всю четверть окружности.
+    octant = circle_octant(radius)
+    return quadrant_spans(np.concatenate([octant, octant[:, ::-1]]))
+
+
+def ellipse_spans(a, b):
+    return quadrant_spans(ellipse_quadrant(a, b))
+
+
+FIGURE_SPANS = {
+    "Окружность": lambda size1, size2: circle_spans(size1),
+    "Эллипс": ellipse_spans,
+}
+
+
+# Шаг округления видимых пределов незамкнутых фигур для ключа кэша (пикселей)
+VIEW_QUANTUM = 16
+
+
+def visible_extent(figure, x0, y0, size1, width, height):
+    """Наибольшие |dx| и |dy| точек фигуры с центром (x0, y0), еще видимых на холсте width x height.
+
+    Парабола рисуется только в одну сторону по y (вверх при size1 > 0), гипербола — в обе.
+    """
+    x_limit = max(x0, width - 1 - x0)
+    if figure == "Парабола":
+        y_limit = y0 if size1 > 0 else height - 1 - y0
+    else:
+        y_limit = max(y0, height - 1 - y0)
+    return max(x_limit, 0), max(y_limit, 0)
+
+
+def figure_points(figure, size1, size2=None, extent=None):
+    """Смещения точек фигуры; extent = (x_limit, y_limit) отсекает гиперболу и параболу."""
+    if figure == "Окружность":
+        return circle_points(size1)
+    if figure == "Эллипс":
+        return ellipse_points(size1, size2)
+    limits = () if extent is None else extent
+    if figure == "Гипербола":
+        return hyperbola_points(size1, size2, *limits)
+    if figure == "Парабола":
+        return parabola_points(size1, *limits)
+    raise ValueError(f"Неизвестная фигура: {figure}")
+
+
+def rasterize_figures(figures, bounds=None):
+    """Строит пакет фигур (figure, x0, y0, size1, size2) одним массивом точек.
+
+    bounds = (width, height) — размер холста для отсечения гипербол и парабол.
+    Возвращает массив (N, 2) абсолютных координат и смещения offsets длины len(figures) + 1:
+    точки i-й фигуры — points[offsets[i]:offsets[i + 1]].
+    """
+    parts = []
+    for figure, x0, y0, size1, size2 in figures:
+        extent = None if bounds is None else visible_extent(figure, x0, y0, size1, *bounds)
+        parts.append(figure_points(figure, size1, size2, extent) + (x0, y0))
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(part) for part in parts], out=offsets[1:])
+    points = np.concatenate(parts) if parts else np.empty((0, 2), dtype=np.int64)
+    return points, offsets
+
+
+class FigureCache:
+    """LRU-кэш смещений точек фигур по ключу (figure, size1, size2, extent).
+
+    Хранит массивы, пока их суммарный размер не превышает max_bytes; при переполнении
+    вытесняются давно не использованные. Ведет счетчики попаданий и промахов.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, build):
+        points = self.entries.get(key)
+        if points is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return points
+
+        self.misses += 1
+        points = build()
+        points.flags.writeable = False  # один массив разделяется всеми попаданиями
+        if points.nbytes <= self.max_bytes:
+            self.entries[key] = points
+            self.size_bytes += points.nbytes
+            self._evict()
+        return points
+
+    def resize(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self.entries.clear()
+        self.size_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self):
+        while self.size_bytes > self.max_bytes and self.entries:
+            _, points = self.entries.popitem(last=False)
+            self.size_bytes -= points.nbytes
 
 
 if __name__ == "__main__":
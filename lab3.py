@@ -1,6 +1,68 @@
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
+from curves import CURVE_BASES, DEFAULT_TOLERANCE, affected_windows, segment_windows, tessellate, window_starts
+
+
+# Цвет линии для каждого типа кривой
+CURVE_COLORS = {"Безье": "black", "Эрмит": "blue", "B-сплайн": "green"}
+
+
+# Радиус захвата управляющей точки мышью (px)
+HIT_RADIUS = 10
+
+# Минимальный интервал между кадрами при перетаскивании (мс); 0 — отрисовка через after_idle
+FRAME_INTERVAL = 16
+
+
+class PointGrid:
+    """
+    Равномерная сетка-хеш над управляющими точками для поиска ближайшей точки за O(1) в среднем.
+    Ячейка со стороной cell хранит индексы попавших в нее точек; при перемещении точка
+    переносится между ячейками, остальная сетка не меняется.
+    """
+
+    def __init__(self, cell=HIT_RADIUS):
+        self.cell = cell
+        self.cells = {}
+
+    def _key(self, x, y):
+        return int(x // self.cell), int(y // self.cell)
+
+    def add(self, idx, x, y):
+        """Добавляет точку с индексом idx."""
+        self.cells.setdefault(self._key(x, y), []).append(idx)
+
+    def move(self, idx, old, new):
+        """Переносит точку idx из позиции old в позицию new."""
+        old_key, new_key = self._key(*old), self._key(*new)
+        if old_key == new_key:
+            return
+        bucket = self.cells[old_key]
+        bucket.remove(idx)
+        if not bucket:
+            del self.cells[old_key]
+        self.cells.setdefault(new_key, []).append(idx)
+
+    def nearest(self, points, x, y, radius=HIT_RADIUS):
+        """Индекс ближайшей к (x, y) точки на расстоянии меньше radius или None.
+
+        При равных расстояниях выбирается меньший индекс, как при линейном переборе."""
+        cx, cy = self._key(x, y)
+        reach = -(-radius // self.cell)
+        best = None
+        best_key = (radius * radius, -1)
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                for idx in self.cells.get((gx, gy), ()):
+                    px, py = points[idx]
+                    key = ((px - x)**2 + (py - y)**2, idx)
+                    if key < best_key:
+                        best, best_key = idx, key
+        return best
+
+    def clear(self):
+        """Удаляет все точки."""
+        self.cells.clear()
 
 
 class CurveDesigner(tk.Tk):
@@ -18,9 +80,18 @@ class CurveDesigner(tk.Tk):
         self.canvas_height = 480
 
         self.points = []
+        self.point_grid = PointGrid()
         self.active_point_idx = None
         self.curve_kind = "Безье"
         self.grid_enabled = True
+        self.flatness_tolerance = DEFAULT_TOLERANCE
+        self.frame_interval = FRAME_INTERVAL
+        self.drag_preview = False  # во время перетаскивания рисовать только контрольный многоугольник
+        self.preview_drawn = False  # эскиз сейчас заменяет кривую на холсте
+        self.dirty_points = set()  # точки, сдвинутые после последнего кадра
+        self.render_job = None
+        self.marker_items = []  # id маркеров на холсте, параллельно self.points
+        self.segment_items = {}  # начало окна сегмента -> id его ломаной на холсте
 
         self._init_interface()
         self._position_window_center()
@@ -42,6 +113,18 @@ class CurveDesigner(tk.Tk):
         self.btn_toggle_grid = ttk.Button(controls, text="Сетка", command=self._toggle_grid)
         self.btn_toggle_grid.pack(side="left", padx=5)
 
+        self.preview_var = tk.BooleanVar(value=self.drag_preview)
+        self.preview_check = ttk.Checkbutton(controls, text="Эскиз при перетаскивании", variable=self.preview_var,
+                                             command=self._toggle_preview)
+        self.preview_check.pack(side="left", padx=5)
+
+        ttk.Label(controls, text="Допуск, px:").pack(side="left", padx=(15, 0))
+        self.tolerance_scale = ttk.Scale(controls, from_=0.1, to=5, orient="horizontal", length=120)
+        self.tolerance_scale.set(self.flatness_tolerance)
+        # Обработчик подключается после начального set: он перерисовывает холст, которого еще нет
+        self.tolerance_scale.configure(command=self._update_tolerance)
+        self.tolerance_scale.pack(side="left", padx=5)
+
         self.canvas = tk.Canvas(self, width=self.canvas_width, height=self.canvas_height, bg="white", cursor="cross")
         self.canvas.pack(pady=10)
         self.canvas.bind("<Button-1>", self._canvas_click)
@@ -57,64 +140,132 @@ class CurveDesigner(tk.Tk):
         self.geometry(f"{ww}x{wh}+{x}+{y}")
 
     def _draw_grid(self):
-        """Рисует сетку на холсте."""
-        if not self.grid_enabled:
-            return
-        spacing = 20
-        for x in range(0, self.canvas_width, spacing):
-            self.canvas.create_line(x, 0, x, self.canvas_height, fill="#eee", tags="grid")
-        for y in range(0, self.canvas_height, spacing):
-            self.canvas.create_line(0, y, self.canvas_width, y, fill="#eee", tags="grid")
+        """Рисует сетку на холсте: линии создаются один раз, дальше только показываются или скрываются."""
+        if not self.canvas.find_withtag("grid"):
+            spacing = 20
+            for x in range(0, self.canvas_width, spacing):
+                self.canvas.create_line(x, 0, x, self.canvas_height, fill="#eee", tags="grid")
+            for y in range(0, self.canvas_height, spacing):
+                self.canvas.create_line(0, y, self.canvas_width, y, fill="#eee", tags="grid")
+            self.canvas.tag_lower("grid")
+        self.canvas.itemconfigure("grid", state="normal" if self.grid_enabled else "hidden")
 
     def _clear_canvas(self):
-        """Очищает холст и список точек."""
+        """Очищает холст и список точек (сетка остается)."""
+        self._cancel_frame()
+        self.dirty_points.clear()
         self.points.clear()
-        self.canvas.delete("all")
-        self._draw_grid()
+        self.point_grid.clear()
+        self.canvas.delete("marker", "curve", "polygon")
+        self.marker_items.clear()
+        self.segment_items.clear()
+        self.preview_drawn = False
 
     def _toggle_grid(self):
         """Включает или выключает отображение сетки."""
         self.grid_enabled = not self.grid_enabled
-        self._redraw_all()
+        self._draw_grid()
 
     def _canvas_click(self, event):
         """Добавление новой точки или выделение существующей."""
-        nearest = None
-        min_dist_sq = float('inf')
-        for idx, (px, py) in enumerate(self.points):
-            dist_sq = (px - event.x)**2 + (py - event.y)**2
-            if dist_sq < 100 and dist_sq < min_dist_sq:
-                min_dist_sq = dist_sq
-                nearest = idx
+        nearest = self.point_grid.nearest(self.points, event.x, event.y)
 
         if nearest is not None:
             self.active_point_idx = nearest
         else:
+            self.point_grid.add(len(self.points), event.x, event.y)
             self.points.append((event.x, event.y))
-            self._redraw_all()
+            self._draw_marker(event.x, event.y)
+            stride = CURVE_BASES[self.curve_kind][1]
+            self._draw_segments(self.curve_kind, affected_windows(len(self.points) - 1, len(self.points), stride))
 
     def _move_point(self, event):
-        """Перемещение точки мышью."""
-        if self.active_point_idx is not None:
-            self.points[self.active_point_idx] = (event.x, event.y)
-            self._redraw_all()
+        """Перемещение точки мышью: позиция запоминается, отрисовка откладывается до следующего кадра."""
+        idx = self.active_point_idx
+        if idx is not None:
+            self.point_grid.move(idx, self.points[idx], (event.x, event.y))
+            self.points[idx] = (event.x, event.y)
+            self.dirty_points.add(idx)
+            self._schedule_frame()
 
     def _release_point(self, event):
-        """Отпускание точки."""
+        """Отпускание точки: дорисовывается последний кадр, после эскиза — полная кривая."""
+        if self.active_point_idx is not None:
+            self._cancel_frame()
+            self._render_frame()
+            if self.preview_drawn:
+                self.preview_drawn = False
+                self.canvas.delete("polygon")
+                self._draw_segments(self.curve_kind)
         self.active_point_idx = None
 
+    def _schedule_frame(self):
+        """Планирует отрисовку кадра, если она еще не запланирована: частые события движения склеиваются."""
+        if self.render_job is None:
+            if self.frame_interval:
+                self.render_job = self.after(self.frame_interval, self._render_frame)
+            else:
+                self.render_job = self.after_idle(self._render_frame)
+
+    def _cancel_frame(self):
+        """Отменяет запланированный кадр."""
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+            self.render_job = None
+
+    def _render_frame(self):
+        """Рисует последние позиции сдвинутых точек: маркеры и зависящие от них сегменты или эскиз."""
+        self.render_job = None
+        if not self.dirty_points:
+            return
+        r = 4
+        for idx in self.dirty_points:
+            x, y = self.points[idx]
+            self.canvas.coords(self.marker_items[idx], x-r, y-r, x+r, y+r)
+        if self.drag_preview:
+            self._draw_control_polygon()
+        else:
+            stride = CURVE_BASES[self.curve_kind][1]
+            starts = set()
+            for idx in self.dirty_points:
+                starts.update(affected_windows(idx, len(self.points), stride))
+            self._draw_segments(self.curve_kind, sorted(starts))
+        self.dirty_points.clear()
+
+    def _draw_control_polygon(self):
+        """Заменяет кривую контрольным многоугольником (эскиз на время перетаскивания)."""
+        self.canvas.delete("curve")
+        self.segment_items.clear()
+        self.preview_drawn = True
+        if len(self.points) < 2:
+            return
+        coords = [c for point in self.points for c in point]
+        if self.canvas.find_withtag("polygon"):
+            self.canvas.coords("polygon", coords)
+        else:
+            self.canvas.create_line(coords, fill="gray", dash=(4, 2), tags="polygon")
+
+    def _toggle_preview(self):
+        """Включает или выключает эскиз при перетаскивании."""
+        self.drag_preview = self.preview_var.get()
+
+    def _update_tolerance(self, value):
+        """Изменяет допуск плоскостности при разбиении кривых."""
+        self.flatness_tolerance = float(value)
+        self._redraw_curve()
+
     def _update_curve_kind(self, event=None):
         """Изменяет тип текущей кривой."""
         self.curve_kind = self.curve_selector.get()
-        self._redraw_all()
-
-    def _redraw_all(self):
-        """Перерисовывает весь холст."""
-        self.canvas.delete("all")
-        self._draw_grid()
+        self._redraw_curve()
 
-        for x, y in self.points:
-            self._draw_marker(x, y)
+    def _redraw_curve(self):
+        """Заменяет слой кривой целиком, не трогая сетку и маркеры."""
+        self._cancel_frame()
+        self.dirty_points.clear()
+        self.canvas.delete("curve", "polygon")
+        self.segment_items.clear()
+        self.preview_drawn = False
 
         if self.curve_kind == "Безье":
             self._draw_bezier()
@@ -124,63 +275,34 @@ class CurveDesigner(tk.Tk):
             self._draw_bspline()
 
     def _draw_marker(self, x, y):
-        """Рисует маркер точки."""
+        """Рисует маркер новой точки и запоминает его id."""
         r = 4
-        self.canvas.create_oval(x-r, y-r, x+r, y+r, fill="red", outline="black")
+        item = self.canvas.create_oval(x-r, y-r, x+r, y+r, fill="red", outline="black", tags="marker")
+        self.marker_items.append(item)
 
     def _draw_bezier(self):
-        if len(self.points) < 4:
-            return
-        step_count = 120
-        for i in range(len(self.points) - 3):
-            pts = self.points[i:i+4]
-            for t in np.linspace(0, 1, step_count):
-                x, y = self._bezier_coords(pts, t)
-                self.canvas.create_oval(x, y, x+1, y+1, fill="black", outline="")
+        self._draw_segments("Безье")
 
     def _draw_hermite(self):
-        if len(self.points) < 4:
-            return
-        step_count = 120
-        for i in range(0, len(self.points) - 3, 3):
-            pts = self.points[i:i+4]
-            for t in np.linspace(0, 1, step_count):
-                x, y = self._hermite_coords(pts, t)
-                self.canvas.create_oval(x, y, x+1, y+1, fill="blue", outline="")
+        self._draw_segments("Эрмит")
 
     def _draw_bspline(self):
-        if len(self.points) < 4:
-            return
-        step_count = 120
-        for i in range(len(self.points) - 3):
-            pts = self.points[i:i+4]
-            for t in np.linspace(0, 1, step_count):
-                x, y = self._bspline_coords(pts, t)
-                self.canvas.create_oval(x, y, x+1, y+1, fill="green", outline="")
-
-    def _bezier_coords(self, pts, t):
-        """Вычисляет координаты Безье."""
-        M = np.array([[-1, 3, -3, 1], [3, -6, 3, 0], [-3, 3, 0, 0], [1, 0, 0, 0]])
-        T = np.array([t**3, t**2, t, 1])
-        P = np.array(pts)
-        return T @ M @ P
-
-    def _hermite_coords(self, pts, t):
-        """Вычисляет координаты Эрмита."""
-        h1 = 2*t**3 - 3*t**2 + 1
-        h2 = -2*t**3 + 3*t**2
-        h3 = t**3 - 2*t**2 + t
-        h4 = t**3 - t**2
-        x = h1 * pts[0][0] + h2 * pts[3][0] + h3 * (pts[1][0] - pts[0][0]) + h4 * (pts[2][0] - pts[3][0])
-        y = h1 * pts[0][1] + h2 * pts[3][1] + h3 * (pts[1][1] - pts[0][1]) + h4 * (pts[2][1] - pts[3][1])
-        return x, y
-
-    def _bspline_coords(self, pts, t):
-        """Вычисляет координаты B-сплайна."""
-        B = np.array([[-1, 3, -3, 1], [3, -6, 3, 0], [-3, 0, 3, 0], [1, 4, 1, 0]]) / 6
-        T = np.array([t**3, t**2, t, 1])
-        P = np.array(pts)
-        return T @ B @ P
+        self._draw_segments("B-сплайн")
+
+    def _draw_segments(self, kind, starts=None):
+        """Рисует сегменты кривой (по умолчанию все) ломаными, заменяя прежние ломаные этих сегментов."""
+        stride = CURVE_BASES[kind][1]
+        if starts is None:
+            starts = window_starts(len(self.points), stride)
+        windows = segment_windows(self.points, stride, starts)
+        points, offsets = tessellate(windows, kind, self.flatness_tolerance)
+        color = CURVE_COLORS[kind]
+        for start, first, last in zip(starts, offsets[:-1].tolist(), offsets[1:].tolist()):
+            item = self.segment_items.get(start)
+            if item is not None:
+                self.canvas.delete(item)
+            self.segment_items[start] = self.canvas.create_line(points[first:last].ravel().tolist(), fill=color,
+                                                                tags="curve")
 
 
 if __name__ == "__main__":
@@ -36,7 +36,7 @@ class ShapeDesigner(tk.Tk):
 
         ttk.Label(control_frame, text="Метод:").pack(side="left", padx=5)
         method_menu = ttk.Combobox(control_frame, textvariable=self.selected_method,
-                                    values=["ЦДА", "Брезенхем", "Ву"], state="readonly", width=10)
+                                    values=["ЦДА", "ЦДА (фикс.)", "Брезенхем", "Ву"], state="readonly", width=12)
         method_menu.pack(side="left")
 
         ttk.Checkbutton(control_frame, text="Сетка", variable=self.grid_enabled, command=self._toggle_grid).pack(side="left", padx=5)
@@ -121,13 +121,21 @@ class ShapeDesigner(tk.Tk):
             x1, y1 = self.intersection_point
             x2, y2 = event.x, event.y
 
+            # Растеризуется только видимая часть отрезка
+            clipped = self._clip_segment(x1, y1, x2, y2, 0, 0,
+                                         self.drawing_area.winfo_width() - 1, self.drawing_area.winfo_height() - 1)
             points = []
-            if self.selected_method.get() == "ЦДА":
-                points = self._draw_dda(x1, y1, x2, y2)
-            elif self.selected_method.get() == "Брезенхем":
-                points = self._draw_bresenham(x1, y1, x2, y2)
-            elif self.selected_method.get() == "Ву":
-                points = self._draw_wu(x1, y1, x2, y2)
+            if clipped is not None and clipped[:2] == clipped[2:]:
+                points = [clipped[:2]]
+            elif clipped is not None:
+                if self.selected_method.get() == "ЦДА":
+                    points = self._draw_dda(*clipped)
+                elif self.selected_method.get() == "ЦДА (фикс.)":
+                    points = self._draw_fixed_dda(*clipped)
+                elif self.selected_method.get() == "Брезенхем":
+                    points = self._draw_bresenham(*clipped)
+                elif self.selected_method.get() == "Ву":
+                    points = self._draw_wu(*clipped)
 
             for px, py in points:
                 self.drawing_area.create_line(px, py, px + 1, py, fill="blue")
@@ -154,6 +162,31 @@ class ShapeDesigner(tk.Tk):
         else:
             messagebox.showwarning("Результат", "Фигура НЕ выпуклая ❌")
 
+    @staticmethod
+    def _clip_segment(x1, y1, x2, y2, xmin, ymin, xmax, ymax):
+        # Отсечение Лиана — Барски; None, если отрезок целиком вне окна
+        dx, dy = x2 - x1, y2 - y1
+        t0, t1 = 0.0, 1.0
+        for p, q in ((-dx, x1 - xmin), (dx, xmax - x1), (-dy, y1 - ymin), (dy, ymax - y1)):
+            if p == 0:
+                if q < 0:
+                    return None
+                continue
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return None
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return None
+                t1 = min(t1, t)
+        if t0 > 0:
+            x1, y1 = round(x1 + t0 * dx), round(y1 + t0 * dy)
+        if t1 < 1:
+            x2, y2 = round(x2 - (1 - t1) * dx), round(y2 - (1 - t1) * dy)
+        return x1, y1, x2, y2
+
     @staticmethod
     def _draw_dda(x1, y1, x2, y2):
         dx, dy = x2 - x1, y2 - y1
@@ -162,6 +195,18 @@ class ShapeDesigner(tk.Tk):
         x, y = x1, y1
         return [(round(x + i * x_inc), round(y + i * y_inc)) for i in range(int(steps) + 1)]
 
+    @staticmethod
+    def _draw_fixed_dda(x1, y1, x2, y2, frac_bits=16):
+        # ЦДА на целых числах с фиксированной точкой: приращение округляется один раз,
+        # пиксель — сдвиг вправо (половина добавлена к началу заранее)
+        dx, dy = x2 - x1, y2 - y1
+        steps = max(abs(dx), abs(dy))
+        x_inc = (2 * (dx << frac_bits) + steps) // (2 * steps)
+        y_inc = (2 * (dy << frac_bits) + steps) // (2 * steps)
+        half = 1 << (frac_bits - 1)
+        x, y = (x1 << frac_bits) + half, (y1 << frac_bits) + half
+        return [((x + i * x_inc) >> frac_bits, (y + i * y_inc) >> frac_bits) for i in range(steps + 1)]
+
     @staticmethod
     def _draw_bresenham(x1, y1, x2, y2):
         points = []